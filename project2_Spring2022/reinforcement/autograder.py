@@ -24,6 +24,8 @@ import random
 random.seed(0)
 try:
     from pacman import GameState
+    # Graders may inspect the states an agent explored
+    GameState.setExploredTracking('set')
 except:
     pass
 
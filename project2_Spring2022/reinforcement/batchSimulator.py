@@ -0,0 +1,307 @@
+# batchSimulator.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A headless simulator that plays many classic Pacman games side by side, for
+collecting training transitions quickly.
+
+All the games share one layout.  Instead of a GameState per game, the
+simulator keeps flat arrays: Pacman's cell, the ghosts' positions, directions
+and scared timers, the score, and the remaining food and capsules of each game
+as bitsets (ints, one bit per open cell).  Each call to step plays one round
+in every running game in lock-step: first Pacman moves in every game, then the
+first ghost in every game, and so on, applying the rules of PacmanRules and
+GhostRules in pacman.py to the arrays directly.  Wall checks come from move
+tables built once per layout.
+
+The rules match pacman.py, including scared ghosts moving at half speed, so
+ghost positions are kept in half cells (doubled coordinates).  Ghosts move
+uniformly at random among their legal actions, like ghostAgents.RandomGhost,
+unless a ghostPolicy is given.
+
+Example:
+  simulator = BatchSimulator(layout.getLayout('mediumClassic'), 64, seed=1)
+  for game, state, action, reward, nextState, done in simulator.transitions(policy, 100000):
+      ...
+"""
+
+import random
+from array import array
+
+from game import Directions
+from pacman import SCARED_TIME, TIME_PENALTY
+
+# Actions in the order GameState.getLegalActions lists them
+ACTIONS = [Directions.WEST, Directions.STOP, Directions.EAST, Directions.NORTH, Directions.SOUTH]
+ACTION_INDEX = dict([(action, i) for i, action in enumerate(ACTIONS)])
+VECTORS = [(-1, 0), (0, 0), (1, 0), (0, 1), (0, -1)]
+STOP = ACTION_INDEX[Directions.STOP]
+REVERSE = [ACTION_INDEX[Directions.REVERSE[action]] for action in ACTIONS]
+
+# Game status codes
+RUNNING, WON, LOST, OUT_OF_MOVES = 0, 1, 2, 3
+
+
+def randomPacmanPolicy(simulator, game, legal):
+    "Chooses uniformly among Pacman's legal actions"
+    return simulator.random.choice(legal)
+
+
+class BatchSimulator:
+    """
+    numGames classic Pacman games on one layout, stepped together.
+
+    numGhosts caps the number of ghosts like pacman.py's -k option.  Games
+    that run longer than maxMoves rounds are stopped with status
+    OUT_OF_MOVES.  With autoReset, a finished game starts over at the
+    beginning of the next step.
+    """
+
+    def __init__(self, layout, numGames, numGhosts=4, seed=None, maxMoves=None, autoReset=False, ghostPolicy=None):
+        self.layout = layout
+        self.numGames = numGames
+        self.maxMoves = maxMoves
+        self.autoReset = autoReset
+        self.ghostPolicy = ghostPolicy
+        self.random = random.Random(seed)
+
+        walls = layout.walls
+        self.cells = walls.asList(False)
+        self.cellIds = dict([(cell, i) for i, cell in enumerate(self.cells)])
+        # Move tables: legal action indices and the cell each one leads to
+        self.legal = []
+        self.nextCell = array('i', [0]) * (len(self.cells) * len(ACTIONS))
+        for cellId, (x, y) in enumerate(self.cells):
+            legal = []
+            for a, (dx, dy) in enumerate(VECTORS):
+                if not walls[x + dx][y + dy]:
+                    legal.append(a)
+                    self.nextCell[cellId * len(ACTIONS) + a] = self.cellIds[(x + dx, y + dy)]
+            self.legal.append(legal)
+
+        self.pacmanStart = None
+        self.ghostStarts = []
+        for isPacman, position in layout.agentPositions:
+            if isPacman:
+                self.pacmanStart = self.cellIds[position]
+            elif len(self.ghostStarts) < numGhosts:
+                self.ghostStarts.append(position)
+        self.numGhosts = len(self.ghostStarts)
+        self.foodStart = 0
+        for position in layout.food.asList():
+            self.foodStart |= 1 << self.cellIds[position]
+        self.capsuleStart = 0
+        for position in layout.capsules:
+            self.capsuleStart |= 1 << self.cellIds[position]
+
+        ghosts = numGames * self.numGhosts
+        self.pacman = array('i', [0]) * numGames
+        self.ghostX = array('i', [0]) * ghosts      # half cells
+        self.ghostY = array('i', [0]) * ghosts
+        self.ghostDirection = array('b', [0]) * ghosts
+        self.scaredTimer = array('i', [0]) * ghosts
+        self.food = [0] * numGames
+        self.capsules = [0] * numGames
+        self.score = array('i', [0]) * numGames
+        self.status = bytearray(numGames)
+        self.moves = array('i', [0]) * numGames
+        for game in range(numGames):
+            self.reset(game)
+
+    def reset(self, game):
+        "Puts a game back at the start of the layout"
+        self.pacman[game] = self.pacmanStart
+        for ghost, (x, y) in enumerate(self.ghostStarts):
+            slot = game * self.numGhosts + ghost
+            self.ghostX[slot], self.ghostY[slot] = 2 * x, 2 * y
+            self.ghostDirection[slot] = STOP
+            self.scaredTimer[slot] = 0
+        self.food[game] = self.foodStart
+        self.capsules[game] = self.capsuleStart
+        self.score[game] = 0
+        self.status[game] = RUNNING
+        self.moves[game] = 0
+
+    def isDone(self, game):
+        return self.status[game] != RUNNING
+
+    def allDone(self):
+        return RUNNING not in self.status
+
+    def getLegalPacmanActions(self, game):
+        if self.status[game] != RUNNING:
+            return []
+        return [ACTIONS[a] for a in self.legal[self.pacman[game]]]
+
+    def getLegalGhostActions(self, game, ghost):
+        "ghost counts from 0, so it is the agent index minus 1"
+        return [ACTIONS[a] for a in self._ghostMoves(game * self.numGhosts + ghost)]
+
+    def getPacmanPosition(self, game):
+        return self.cells[self.pacman[game]]
+
+    def getGhostPositions(self, game):
+        "The ghost positions as (x, y), which are halves while a scared ghost is between cells"
+        start = game * self.numGhosts
+        return [(self.ghostX[slot] / 2.0, self.ghostY[slot] / 2.0) for slot in range(start, start + self.numGhosts)]
+
+    def getNumFood(self, game):
+        return bin(self.food[game]).count('1')
+
+    def observe(self, game):
+        """
+        Returns a hashable snapshot of a game: (Pacman's position, ghost
+        positions, scared timers, food bits, capsule bits).
+        """
+        start = game * self.numGhosts
+        end = start + self.numGhosts
+        return (self.getPacmanPosition(game), tuple(self.getGhostPositions(game)),
+                tuple(self.scaredTimer[start:end]), self.food[game], self.capsules[game])
+
+    def _ghostMoves(self, slot):
+        x, y = self.ghostX[slot], self.ghostY[slot]
+        direction = self.ghostDirection[slot]
+        if x % 2 or y % 2:
+            # In between grid points, ghosts must continue straight
+            return [direction]
+        moves = [a for a in self.legal[self.cellIds[(x // 2, y // 2)]] if a != STOP]
+        if len(moves) > 1 and REVERSE[direction] in moves:
+            moves.remove(REVERSE[direction])
+        return moves
+
+    def step(self, pacmanActions):
+        """
+        Plays one round in every running game: Pacman takes
+        pacmanActions[game] (ignored for games that are over), then each ghost
+        moves in turn.  Returns the score change of every game this round.
+        """
+        if self.autoReset:
+            for game in range(self.numGames):
+                if self.status[game] != RUNNING:
+                    self.reset(game)
+        before = self.score[:]
+        status, score = self.status, self.score
+        running = [game for game in range(self.numGames) if status[game] == RUNNING]
+
+        for game in running:
+            self._movePacman(game, ACTION_INDEX[pacmanActions[game]])
+        for ghost in range(self.numGhosts):
+            running = [game for game in running if status[game] == RUNNING]
+            for game in running:
+                self._moveGhost(game, ghost)
+        for game in running:
+            self.moves[game] += 1
+            if status[game] == RUNNING and self.maxMoves is not None and self.moves[game] >= self.maxMoves:
+                status[game] = OUT_OF_MOVES
+        return [score[game] - before[game] for game in range(self.numGames)]
+
+    def _movePacman(self, game, action):
+        cell = self.pacman[game]
+        if action not in self.legal[cell]:
+            raise Exception("Illegal action " + str(ACTIONS[action]))
+        cell = self.nextCell[cell * len(ACTIONS) + action]
+        self.pacman[game] = cell
+        bit = 1 << cell
+        change = -TIME_PENALTY
+        if self.food[game] & bit:
+            change += 10
+            self.food[game] &= ~bit
+            if not self.food[game]:
+                change += 500
+                self.status[game] = WON
+        if self.capsules[game] & bit:
+            self.capsules[game] &= ~bit
+            start = game * self.numGhosts
+            for slot in range(start, start + self.numGhosts):
+                self.scaredTimer[slot] = SCARED_TIME
+        self.score[game] += change
+        x, y = self.cells[cell]
+        for ghost in range(self.numGhosts):
+            self._checkDeath(game, ghost, 2 * x, 2 * y)
+
+    def _moveGhost(self, game, ghost):
+        slot = game * self.numGhosts + ghost
+        moves = self._ghostMoves(slot)
+        if self.ghostPolicy is not None:
+            action = ACTION_INDEX[self.ghostPolicy(self, game, ghost, [ACTIONS[a] for a in moves])]
+            if action not in moves:
+                raise Exception("Illegal ghost action " + str(ACTIONS[action]))
+        else:
+            action = moves[int(self.random.random() * len(moves))]
+        # Half a cell per move while scared, a whole cell otherwise
+        speed = 2
+        if self.scaredTimer[slot] > 0:
+            speed = 1
+        dx, dy = VECTORS[action]
+        self.ghostX[slot] += dx * speed
+        self.ghostY[slot] += dy * speed
+        if action != STOP:
+            self.ghostDirection[slot] = action
+        timer = self.scaredTimer[slot]
+        if timer == 1:
+            # Back onto the nearest grid point, rounding halves up like util.nearestPoint
+            self.ghostX[slot] = (self.ghostX[slot] + 1) // 2 * 2
+            self.ghostY[slot] = (self.ghostY[slot] + 1) // 2 * 2
+        self.scaredTimer[slot] = max(0, timer - 1)
+        x, y = self.cells[self.pacman[game]]
+        self._checkDeath(game, ghost, 2 * x, 2 * y)
+
+    def _checkDeath(self, game, ghost, pacmanX, pacmanY):
+        slot = game * self.numGhosts + ghost
+        # pacman.COLLISION_TOLERANCE is 0.7 cells, which is 1 half cell
+        if abs(self.ghostX[slot] - pacmanX) + abs(self.ghostY[slot] - pacmanY) > 1:
+            return
+        if self.scaredTimer[slot] > 0:
+            self.score[game] += 200
+            x, y = self.ghostStarts[ghost]
+            self.ghostX[slot], self.ghostY[slot] = 2 * x, 2 * y
+            self.ghostDirection[slot] = STOP
+            self.scaredTimer[slot] = 0
+        elif self.status[game] != WON:
+            self.score[game] -= 500
+            self.status[game] = LOST
+
+    def transitions(self, pacmanPolicy=randomPacmanPolicy, limit=None):
+        """
+        Plays every game to the end, or forever with autoReset, and yields
+        (game, state, action, reward, nextState, done) for each Pacman move,
+        where the states come from observe.  pacmanPolicy(simulator, game,
+        legalActions) picks Pacman's action.  Stops after limit transitions.
+        """
+        count = 0
+        while not self.allDone() or self.autoReset:
+            if self.autoReset:
+                for game in range(self.numGames):
+                    if self.status[game] != RUNNING:
+                        self.reset(game)
+            actions = [None] * self.numGames
+            states = [None] * self.numGames
+            for game in range(self.numGames):
+                if self.status[game] == RUNNING:
+                    states[game] = self.observe(game)
+                    actions[game] = pacmanPolicy(self, game, self.getLegalPacmanActions(game))
+            rewards = self.step(actions)
+            for game in range(self.numGames):
+                if states[game] is None:
+                    continue
+                yield game, states[game], actions[game], rewards[game], self.observe(game), self.status[game] != RUNNING
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+    def play(self, pacmanPolicy=randomPacmanPolicy):
+        "Plays every game to the end (autoReset must be off) and returns the final scores"
+        for transition in self.transitions(pacmanPolicy):
+            pass
+        return list(self.score)
@@ -41,7 +41,18 @@ class CoordinateExtractor(FeatureExtractor):
         feats['action=%s' % action] = 1.0
         return feats
 
-def closestFood(pos, food, walls):
+def legalNeighbors(position, walls, layout=None):
+    """
+    Actions.getLegalNeighbors, looked up in the layout's move tables when a
+    layout is given and the position is integral.
+    """
+    if layout is not None:
+        neighbors = layout.getLegalNeighbors(position)
+        if neighbors is not None:
+            return neighbors
+    return Actions.getLegalNeighbors(position, walls)
+
+def closestFood(pos, food, walls, layout=None):
     """
     closestFood -- this is similar to the function that we have
     worked on in the search project; here its all in one place
@@ -57,7 +68,7 @@ def closestFood(pos, food, walls):
         if food[pos_x][pos_y]:
             return dist
         # otherwise spread out from the location to its neighbours
-        nbrs = Actions.getLegalNeighbors((pos_x, pos_y), walls)
+        nbrs = legalNeighbors((pos_x, pos_y), walls, layout)
         for nbr_x, nbr_y in nbrs:
             fringe.append((nbr_x, nbr_y, dist+1))
     # no food found
@@ -77,6 +88,7 @@ class SimpleExtractor(FeatureExtractor):
         food = state.getFood()
         walls = state.getWalls()
         ghosts = state.getGhostPositions()
+        layout = state.data.layout
 
         features = util.Counter()
 
@@ -88,13 +100,13 @@ class SimpleExtractor(FeatureExtractor):
         next_x, next_y = int(x + dx), int(y + dy)
 
         # count the number of ghosts 1-step away
-        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in Actions.getLegalNeighbors(g, walls) for g in ghosts)
+        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in legalNeighbors(g, walls, layout) for g in ghosts)
 
         # if there is no danger of ghosts then add the food feature
         if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
             features["eats-food"] = 1.0
 
-        dist = closestFood((next_x, next_y), food, walls)
+        dist = closestFood((next_x, next_y), food, walls, layout)
         if dist is not None:
             # make the distance a number less than one otherwise the update
             # will diverge wildly
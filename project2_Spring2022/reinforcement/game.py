@@ -37,7 +37,17 @@ class Agent:
     following methods which will be called if they exist:
 
     def registerInitialState(self, state): # inspects the starting state
+
+    An agent that only reads the states it is given, and never changes them
+    or anything reached through them, can set readOnlyState.  The Game then
+    hands it a read-only view of the live state instead of a deep copy.
+
+    An agent that calls into the graphics (reading the keyboard, say) sets
+    usesDisplay, so the Game calls it on its own thread: Tk only works from
+    the thread that runs it.
     """
+    readOnlyState = False
+    usesDisplay = False
 
     def __init__(self, index=0):
         self.index = index
@@ -394,18 +404,32 @@ class Actions:
 
 
 class GameStateData:
+    """
+    The data behind a GameState.
+
+    A successor shares its predecessor's food grid, capsule list, eaten flags
+    and AgentStates (copy on write): only the parts the move changes are
+    copied, by getAgentStateForUpdate, getCapsulesForUpdate and
+    getEatenForUpdate (the food grid is replaced by PacmanRules.consume).  Code that changes a GameStateData must go through
+    those, since writing to a shared object would change every state that
+    shares it.  deepCopy still returns a data packet that shares nothing.
+    """
 
     def __init__(self, prevState=None):
         """
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            # PacmanRules.consume replaces the grid before eating from it
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+        self._ownedAgents = set()  # indices of agentStates this packet has its own copy of
+        self._ownsCapsules = False
+        self._ownsEaten = False
 
         self._foodEaten = None
         self._foodAdded = None
@@ -417,20 +441,54 @@ class GameStateData:
 
     def deepCopy(self):
         state = GameStateData(self)
+        state.agentStates = self.copyAgentStates(self.agentStates)
+        state._ownedAgents = set(range(len(state.agentStates)))
+        state.capsules = self.capsules[:]
+        state._ownsCapsules = True
+        state._eaten = self._eaten[:]
+        state._ownsEaten = True
         state.food = self.food.deepCopy()
-        state.layout = self.layout.deepCopy()
+        state.layout = self.layout  # layouts never change
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def readOnlyView(self):
+        "Returns a ReadOnlyGameStateData that shares everything with this one"
+        return ReadOnlyGameStateData(self)
+
     def copyAgentStates(self, agentStates):
         copiedStates = []
         for agentState in agentStates:
             copiedStates.append(agentState.copy())
         return copiedStates
 
+    def getAgentStateForUpdate(self, agentIndex):
+        """
+        Returns agentStates[agentIndex], first replacing it with a private copy
+        if it is still shared with the predecessor.
+        """
+        if agentIndex not in self._ownedAgents:
+            self.agentStates[agentIndex] = self.agentStates[agentIndex].copy()
+            self._ownedAgents.add(agentIndex)
+        return self.agentStates[agentIndex]
+
+    def getCapsulesForUpdate(self):
+        "Returns the capsule list, copying it first if it is still shared"
+        if not self._ownsCapsules:
+            self.capsules = self.capsules[:]
+            self._ownsCapsules = True
+        return self.capsules
+
+    def getEatenForUpdate(self):
+        "Returns the list of eaten flags, copying it first if it is still shared"
+        if not self._ownsEaten:
+            self._eaten = self._eaten[:]
+            self._ownsEaten = True
+        return self._eaten
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -520,7 +578,7 @@ class GameStateData:
         """
         self.food = layout.food.copy()
         #self.capsules = []
-        self.capsules = layout.capsules[:]
+        self.capsules = list(layout.capsules)
         self.layout = layout
         self.score = 0
         self.scoreChange = 0
@@ -536,6 +594,49 @@ class GameStateData:
             self.agentStates.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
         self._eaten = [False for a in self.agentStates]
+        self._ownedAgents = set(range(len(self.agentStates)))
+        self._ownsCapsules = True
+        self._ownsEaten = True
+
+
+class ReadOnlyGameStateData(GameStateData):
+    """
+    A view of a GameStateData for agents with readOnlyState set.  It shares
+    the food grid, capsules, eaten flags and AgentStates of the data it was
+    made from, so making one costs almost nothing, and it refuses to be
+    changed: assigning to it or asking for something to update raises.
+    Successors generated from it are ordinary, copy-on-write packets.
+
+    The shared objects themselves (the food Grid, the AgentStates) are not
+    guarded, which is why only agents that promise not to change them get a
+    view.
+    """
+
+    def __init__(self, prevState):
+        GameStateData.__init__(self, prevState)
+        self._foodEaten = prevState._foodEaten
+        self._foodAdded = prevState._foodAdded
+        self._capsuleEaten = prevState._capsuleEaten
+        self._agentMoved = prevState._agentMoved
+        self._lose = prevState._lose
+        self._win = prevState._win
+        self.scoreChange = prevState.scoreChange
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise Exception('Cannot change a read-only GameStateData')
+        object.__setattr__(self, name, value)
+
+    def _refuseUpdate(self, *args):
+        raise Exception('Cannot change a read-only GameStateData')
+
+    getAgentStateForUpdate = _refuseUpdate
+    getCapsulesForUpdate = _refuseUpdate
+    getEatenForUpdate = _refuseUpdate
+
+    def readOnlyView(self):
+        return self
 
 
 try:
@@ -563,6 +664,7 @@ class Game:
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
         self.agentTimeout = False
+        self.agentWorkers = None
         import io
         self.agentOutput = [io.StringIO() for agent in agents]
 
@@ -580,6 +682,12 @@ class Game:
         self.agentCrashed = True
         self.rules.agentCrash(self, agentIndex)
 
+    def _stateForAgent(self, agent):
+        "A read-only view of the state for agents that declare readOnlyState, otherwise a deep copy"
+        if getattr(agent, 'readOnlyState', False):
+            return self.state.getReadOnlyView()
+        return self.state.deepCopy()
+
     OLD_STDOUT = None
     OLD_STDERR = None
 
@@ -604,7 +712,35 @@ class Game:
     def run(self):
         """
         Main control loop for game play.
+
+        With catchExceptions set, each agent is called on its own
+        TimeoutWorker thread so the time limits of the rules are enforced
+        to the fraction of a second without signals, which also lets games
+        run outside the main thread.  Agents that set usesDisplay are the
+        exception: they are called on this thread, under a TimeoutFunction.
         """
+        if self.catchExceptions:
+            self.agentWorkers = [None if getattr(agent, 'usesDisplay', False) else TimeoutWorker('Agent %d' % i)
+                                 for i, agent in enumerate(self.agents)]
+        try:
+            self._run()
+        finally:
+            if self.agentWorkers is not None:
+                for worker in self.agentWorkers:
+                    if worker is not None:
+                        worker.close()
+                self.agentWorkers = None
+
+    def _callAgent(self, agentIndex, timeout, function, *args):
+        "Calls an agent with a time limit, raising TimeoutFunctionException if it runs over"
+        worker = self.agentWorkers[agentIndex]
+        if worker is not None:
+            return worker.call(timeout, function, *args)
+        if timeout <= 0:
+            raise TimeoutFunctionException()
+        return TimeoutFunction(function, timeout)(*args)
+
+    def _run(self):
         self.display.initialize(self.state.data)
         self.numMoves = 0
 
@@ -624,12 +760,11 @@ class Game:
                 self.mute(i)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(
-                            agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
                         try:
-                            start_time = time.time()
-                            timed_func(self.state.deepCopy())
-                            time_taken = time.time() - start_time
+                            start_time = time.monotonic()
+                            self._callAgent(i, self.rules.getMaxStartupTime(i),
+                                            agent.registerInitialState, self._stateForAgent(agent))
+                            time_taken = time.monotonic() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
                             print("Agent %d ran out of time on startup!" %
@@ -643,7 +778,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self._stateForAgent(agent))
                 # TODO: could this exceed the total time
                 self.unmute()
 
@@ -660,14 +795,14 @@ class Game:
                 self.mute(agentIndex)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.observationFunction, int(
-                            self.rules.getMoveTimeout(agentIndex)))
                         try:
-                            start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            start_time = time.monotonic()
+                            observation = self._callAgent(
+                                agentIndex, self.rules.getMoveTimeout(agentIndex), agent.observationFunction,
+                                self._stateForAgent(agent))
                         except TimeoutFunctionException:
                             skip_action = True
-                        move_time += time.time() - start_time
+                        move_time += time.monotonic() - start_time
                         self.unmute()
                     except Exception as data:
                         self._agentCrash(agentIndex, quiet=False)
@@ -675,23 +810,22 @@ class Game:
                         return
                 else:
                     observation = agent.observationFunction(
-                        self.state.deepCopy())
+                        self._stateForAgent(agent))
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self._stateForAgent(agent)
 
             # Solicit an action
             action = None
             self.mute(agentIndex)
             if self.catchExceptions:
                 try:
-                    timed_func = TimeoutFunction(agent.getAction, int(
-                        self.rules.getMoveTimeout(agentIndex)) - int(move_time))
                     try:
-                        start_time = time.time()
+                        start_time = time.monotonic()
                         if skip_action:
                             raise TimeoutFunctionException()
-                        action = timed_func(observation)
+                        action = self._callAgent(
+                            agentIndex, self.rules.getMoveTimeout(agentIndex) - move_time, agent.getAction, observation)
                     except TimeoutFunctionException:
                         print("Agent %d timed out on a single move!" %
                               agentIndex, file=sys.stderr)
@@ -700,7 +834,7 @@ class Game:
                         self.unmute()
                         return
 
-                    move_time += time.time() - start_time
+                    move_time += time.monotonic() - start_time
 
                     if move_time > self.rules.getMoveWarningTime(agentIndex):
                         self.totalAgentTimeWarnings[agentIndex] += 1
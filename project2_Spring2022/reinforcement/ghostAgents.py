@@ -21,6 +21,8 @@ import util
 
 
 class GhostAgent(Agent):
+    readOnlyState = True
+
     def __init__(self, index):
         self.index = index
 
@@ -28,6 +28,9 @@ class KeyboardAgent(Agent):
     SOUTH_KEY = 's'
     STOP_KEY = 'q'
 
+    # Reads the keys from the graphics window
+    usesDisplay = True
+
     def __init__(self, index=0):
 
         self.lastMove = Directions.STOP
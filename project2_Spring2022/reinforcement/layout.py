@@ -13,19 +13,33 @@
 
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, Directions
 import os
+import sys
+import mmap
 import random
-from functools import reduce
+import struct
+from array import array
 
 VISIBILITY_MATRIX_CACHE = {}
+LAYOUT_CACHE = {}
 
 
 class Layout:
     """
     A Layout manages the static information about the game board.
+
+    Layouts don't change once they are made: the board attributes can't be
+    assigned to, capsules and agentPositions are tuples, and the walls and
+    food Grids must be copied before changing them (GameStateData copies the
+    food).  That lets every state of a game, and every game on the same
+    board, share one Layout; getLayout hands out one per layout text (see
+    internLayout) and deepCopy returns the layout itself.
     """
 
+    _BOARD_ATTRIBUTES = frozenset(['width', 'height', 'walls', 'food', 'capsules', 'agentPositions',
+                                   'numGhosts', 'layoutText', 'totalFood'])
+
     def __init__(self, layoutText):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
@@ -35,36 +49,32 @@ class Layout:
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
-        self.layoutText = layoutText
+        self.capsules = tuple(self.capsules)
+        self.agentPositions = tuple(self.agentPositions)
+        self.layoutText = tuple(layoutText)
         self.totalFood = len(self.food.asList())
-        # self.initializeVisibilityMatrix()
+        self.moveTables = None  # built by getLegalActions / getLegalNeighbors
+        self.moveMasks = None  # the legal moves of every cell, from a compiled layout
+        self.visibility = None  # built by isVisibleFrom
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if name in Layout._BOARD_ATTRIBUTES and getattr(self, '_frozen', False):
+            raise Exception('Layouts cannot be changed; make a new one from changed layoutText')
+        object.__setattr__(self, name, value)
 
     def getNumGhosts(self):
         return self.numGhosts
 
     def initializeVisibilityMatrix(self):
-        global VISIBILITY_MATRIX_CACHE
-        if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
-            from game import Directions
-            vecs = [(-0.5, 0), (0.5, 0), (0, -0.5), (0, 0.5)]
-            dirs = [Directions.NORTH, Directions.SOUTH,
-                    Directions.WEST, Directions.EAST]
-            vis = Grid(self.width, self.height, {Directions.NORTH: set(), Directions.SOUTH: set(
-            ), Directions.EAST: set(), Directions.WEST: set(), Directions.STOP: set()})
-            for x in range(self.width):
-                for y in range(self.height):
-                    if self.walls[x][y] == False:
-                        for vec, direction in zip(vecs, dirs):
-                            dx, dy = vec
-                            nextx, nexty = x + dx, y + dy
-                            while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)]:
-                                vis[x][y][direction].add((nextx, nexty))
-                                nextx, nexty = x + dx, y + dy
-            self.visibility = vis
-            VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
-        else:
-            self.visibility = VISIBILITY_MATRIX_CACHE[reduce(
-                str.__add__, self.layoutText)]
+        """
+        Sets self.visibility to the VisibilityIndex of these walls, shared by
+        every layout with the same walls.
+        """
+        key = (self.width, self.height, _packCells(self.walls))
+        if key not in VISIBILITY_MATRIX_CACHE:
+            VISIBILITY_MATRIX_CACHE[key] = VisibilityIndex(self.walls)
+        self.visibility = VISIBILITY_MATRIX_CACHE[key]
 
     def isWall(self, pos):
         x, col = pos
@@ -90,14 +100,60 @@ class Layout:
         return pos
 
     def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
-        row, col = [int(x) for x in pacPos]
-        return ghostPos in self.visibility[row][col][pacDirection]
+        if self.visibility is None:
+            self.initializeVisibilityMatrix()
+        return self.visibility.isVisible(ghostPos, pacPos, pacDirection)
 
     def __str__(self):
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        # Nothing in a layout can change, so a copy can be the layout itself
+        return self
+
+    def buildMoveTables(self):
+        """
+        Precomputes, for every open cell, the actions a wall doesn't block (in
+        the order of Actions.getPossibleActions) and the cells
+        Actions.getLegalNeighbors would return.
+        """
+        if self.moveMasks is not None:
+            self.moveTables = _readMoveTables(self.width, self.height, self.moveMasks)
+            return
+        from game import Actions
+        legalActions, legalNeighbors = {}, {}
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.walls[x][y]:
+                    continue
+                actions, neighbors = [], []
+                for direction, (dx, dy) in Actions._directionsAsList:
+                    nextX, nextY = x + dx, y + dy
+                    if 0 <= nextX < self.width and 0 <= nextY < self.height and not self.walls[nextX][nextY]:
+                        actions.append(direction)
+                        neighbors.append((nextX, nextY))
+                legalActions[(x, y)] = tuple(actions)
+                legalNeighbors[(x, y)] = tuple(neighbors)
+        self.moveTables = (legalActions, legalNeighbors)
+
+    def getLegalActions(self, position):
+        """
+        Returns the actions walls allow from an integral position, as a tuple,
+        or None if the position is not an open cell.
+        """
+        if self.moveTables is None:
+            self.buildMoveTables()
+        return self.moveTables[0].get(position)
+
+    def getLegalNeighbors(self, position):
+        """
+        Returns the cells reachable in one move (including position itself)
+        from an integral position, as a tuple, or None if the position is not
+        an open cell.
+        """
+        if self.moveTables is None:
+            self.buildMoveTables()
+        return self.moveTables[1].get(position)
 
     def processLayoutText(self, layoutText):
         """
@@ -137,20 +193,171 @@ class Layout:
             self.numGhosts += 1
 
 
+class VisibilityIndex:
+    """
+    What a Pacman looking straight ahead can see, for every cell of a walls
+    Grid.  For each open cell and each of the four directions it holds the
+    number of open cells before the first wall (or the edge of the board), so
+    the visible points in that direction are the half steps up to the middle
+    of the wall's edge.  Checking whether a ghost is in sight is then a
+    comparison against one number instead of a search through a set.
+    """
+
+    # The order of the runs of a cell in runs
+    DIRECTIONS = ((Directions.NORTH, (0, 1)), (Directions.SOUTH, (0, -1)),
+                  (Directions.EAST, (1, 0)), (Directions.WEST, (-1, 0)))
+    _SLOTS = dict([(direction, slot) for slot, (direction, vector) in enumerate(DIRECTIONS)])
+
+    def __init__(self, walls, runs=None):
+        """
+        Builds the index of walls, or wraps runs (an array('H') laid out as
+        the runs attribute) if it has already been computed.
+        """
+        self.width, self.height = walls.width, walls.height
+        self.runs = runs if runs is not None else self._computeRuns(walls)
+
+    def _computeRuns(self, walls):
+        # runs[4 * (x * height + y) + slot] is the run from (x, y) in DIRECTIONS[slot]
+        width, height = self.width, self.height
+        runs = array('H', bytes(8 * width * height))
+        for slot, (direction, (dx, dy)) in enumerate(VisibilityIndex.DIRECTIONS):
+            # Visit the cells so the one a step ahead is always done first
+            xs = range(width - 1, -1, -1) if dx > 0 else range(width)
+            ys = range(height - 1, -1, -1) if dy > 0 else range(height)
+            for x in xs:
+                for y in ys:
+                    nextX, nextY = x + dx, y + dy
+                    if walls[x][y] or not (0 <= nextX < width and 0 <= nextY < height) or walls[nextX][nextY]:
+                        continue
+                    runs[4 * (x * height + y) + slot] = runs[4 * (nextX * height + nextY) + slot] + 1
+        return runs
+
+    def getRun(self, pos, direction):
+        "Returns the number of open cells in sight from an integral pos"
+        x, y = pos
+        return self.runs[4 * (x * self.height + y) + VisibilityIndex._SLOTS[direction]]
+
+    def isVisible(self, ghostPos, pacPos, pacDirection):
+        """
+        Returns whether ghostPos lies in the line of sight of a Pacman at
+        pacPos (rounded down to a cell) facing pacDirection.  Pacman's own
+        position and Directions.STOP see nothing.
+        """
+        slot = VisibilityIndex._SLOTS.get(pacDirection)
+        if slot is None:
+            return False
+        x, y = [int(c) for c in pacPos]
+        ghostX, ghostY = ghostPos
+        dx, dy = VisibilityIndex.DIRECTIONS[slot][1]
+        if dx:
+            if ghostY != y:
+                return False
+            ahead = (ghostX - x) * dx
+        else:
+            if ghostX != x:
+                return False
+            ahead = (ghostY - y) * dy
+        return 0 < ahead <= self.runs[4 * (x * self.height + y) + slot] + 0.5
+
+    def toBytes(self):
+        "Returns runs as little endian bytes, for writeCompiledLayout"
+        runs = array('H', self.runs)
+        if sys.byteorder != 'little':
+            runs.byteswap()
+        return runs.tobytes()
+
+    @staticmethod
+    def fromBytes(walls, data):
+        "Returns the index of walls from the bytes toBytes returned"
+        runs = array('H')
+        runs.frombytes(data)
+        if sys.byteorder != 'little':
+            runs.byteswap()
+        return VisibilityIndex(walls, runs)
+
+
+def internLayout(layoutText):
+    """
+    Returns the Layout for layoutText (a list of rows), making it only the
+    first time a board with this text is asked for.
+    """
+    key = tuple(layoutText)
+    layout = LAYOUT_CACHE.get(key)
+    if layout is None:
+        layout = Layout(key)
+        LAYOUT_CACHE[key] = layout
+    return layout
+
+
+class LayoutRegistry:
+    """
+    Finds layout files by name without changing directory.  A name is looked
+    for, as getLayout always has, as layouts/<name>.lay and then <name>.lay
+    in the current directory and in the parent directories above it, but the
+    parents are joined onto the path instead of chdir-ing into them.  Each
+    directory is listed once and the listing remembered, so finding a layout
+    costs no file system calls after the first time.
+    """
+
+    def __init__(self):
+        self.listings = {}
+
+    def _listing(self, directory):
+        if directory not in self.listings:
+            try:
+                self.listings[directory] = set(os.listdir(directory))
+            except OSError:
+                self.listings[directory] = set()
+        return self.listings[directory]
+
+    def _search(self, fileName, back):
+        directory = os.path.abspath('.')
+        for level in range(back + 2):
+            for candidate in [os.path.join(directory, 'layouts', fileName), os.path.join(directory, fileName)]:
+                folder, baseName = os.path.split(os.path.normpath(candidate))
+                if baseName in self._listing(folder):
+                    return candidate
+            directory = os.path.dirname(directory)
+        return None
+
+    def find(self, name, back=2):
+        """
+        Returns the path of the layout file for name (with or without .lay),
+        looking up to back + 1 directories above the current one, or None.
+        """
+        fileName = name
+        if not fileName.endswith('.lay'):
+            fileName += '.lay'
+        path = self._search(fileName, back)
+        if path is None and self.listings:
+            # The layout may have been written since the directories were listed
+            self.listings = {}
+            path = self._search(fileName, back)
+        return path
+
+
+LAYOUT_REGISTRY = LayoutRegistry()
+
+
 def getLayout(name, back=2):
-    if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None:
-            layout = tryToLoad(name)
-    else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None:
-            layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back - 1)
-        os.chdir(curdir)
+    path = LAYOUT_REGISTRY.find(name, back)
+    if path is None:
+        return None
+    return loadLayout(path)
+
+
+def loadLayout(fileName, compile=True):
+    """
+    Loads the layout in fileName, from its compiled copy (see
+    writeCompiledLayout) if there is an up to date one.  Otherwise the text
+    is parsed and, if compile is set, a compiled copy is written for next
+    time.
+    """
+    layout = readCompiledLayout(fileName)
+    if layout is None:
+        layout = tryToLoad(fileName)
+        if layout is not None and compile:
+            writeCompiledLayout(layout, fileName)
     return layout
 
 
@@ -159,6 +366,166 @@ def tryToLoad(fullname):
         return None
     f = open(fullname)
     try:
-        return Layout([line.strip() for line in f])
+        return internLayout([line.strip() for line in f])
     finally:
         f.close()
+
+
+# Compiled layouts
+#
+# A compiled layout (<name>.layc next to <name>.lay) holds the parsed board
+# so loading it skips processLayoutText, buildMoveTables and the
+# VisibilityIndex.  It is only
+# used while the size and modification time of the .lay file match the ones
+# recorded in it.  All numbers are little endian:
+#
+#   header        magic, version, width, height, .lay size, .lay mtime (ns),
+#                 number of capsules, agents and ghosts, text length
+#   walls, food   one bit per cell, cell x * height + y, lowest bit first
+#   capsules      x, y for each
+#   agents        isPacman, x, y for each, in agentPositions order
+#   moves         one byte per cell, bit i set if the i-th direction of
+#                 Actions._directionsAsList is legal (0 for walls)
+#   visibility    VisibilityIndex.runs, four unsigned shorts per cell
+#   text          the layout text, rows joined by newlines, utf-8
+
+COMPILED_SUFFIX = 'c'
+_COMPILED_MAGIC = b'LAYC'
+_COMPILED_VERSION = 2
+_COMPILED_HEADER = struct.Struct('<4sHHHQqHHHI')
+_COMPILED_POSITION = struct.Struct('<HH')
+_COMPILED_AGENT = struct.Struct('<?HH')
+
+
+def _packCells(grid):
+    bits = 0
+    for x in range(grid.width):
+        column = grid[x]
+        for y in range(grid.height):
+            if column[y]:
+                bits |= 1 << (x * grid.height + y)
+    return bits.to_bytes((grid.width * grid.height + 7) // 8, 'little')
+
+
+def _unpackCells(width, height, data):
+    cells = format(int.from_bytes(data, 'little'), '0%db' % (width * height))[::-1]
+    grid = Grid(width, height, False)
+    grid.data = [[cell == '1' for cell in cells[x * height:(x + 1) * height]] for x in range(width)]
+    return grid
+
+
+def writeCompiledLayout(layout, fileName):
+    """
+    Writes the compiled copy of layout, which was loaded from fileName.
+    Returns False if it could not be written (a read only directory, say),
+    which only means the next load parses the text again.
+    """
+    from game import Actions
+    try:
+        source = os.stat(fileName)
+        moves = bytearray(layout.width * layout.height)
+        for x in range(layout.width):
+            for y in range(layout.height):
+                actions = layout.getLegalActions((x, y)) or ()
+                mask = 0
+                for bit, (direction, vector) in enumerate(Actions._directionsAsList):
+                    if direction in actions:
+                        mask |= 1 << bit
+                moves[x * layout.height + y] = mask
+        text = '\n'.join(layout.layoutText).encode('utf-8')
+        parts = [_COMPILED_HEADER.pack(_COMPILED_MAGIC, _COMPILED_VERSION, layout.width, layout.height,
+                                       source.st_size, source.st_mtime_ns, len(layout.capsules),
+                                       len(layout.agentPositions), layout.numGhosts, len(text)),
+                 _packCells(layout.walls), _packCells(layout.food)]
+        parts += [_COMPILED_POSITION.pack(x, y) for x, y in layout.capsules]
+        parts += [_COMPILED_AGENT.pack(isPacman, x, y) for isPacman, (x, y) in layout.agentPositions]
+        visibility = VisibilityIndex(layout.walls)
+        parts += [bytes(moves), visibility.toBytes(), text]
+        temporary = '%s.%d.tmp' % (fileName + COMPILED_SUFFIX, os.getpid())
+        with open(temporary, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(temporary, fileName + COMPILED_SUFFIX)
+        return True
+    except (OSError, struct.error):
+        return False
+
+
+def readCompiledLayout(fileName):
+    """
+    Returns the layout from the compiled copy of fileName, or None if there
+    is none or it is out of date.  The file is memory mapped and read in
+    place.
+    """
+    try:
+        source = os.stat(fileName)
+        f = open(fileName + COMPILED_SUFFIX, 'rb')
+    except OSError:
+        return None
+    try:
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            (magic, version, width, height, size, mtime, numCapsules, numAgents, numGhosts,
+             textLength) = _COMPILED_HEADER.unpack_from(data)
+            if (magic != _COMPILED_MAGIC or version != _COMPILED_VERSION or size != source.st_size
+                    or mtime != source.st_mtime_ns):
+                return None
+            cells = width * height
+            gridBytes = (cells + 7) // 8
+            offset = _COMPILED_HEADER.size + 2 * gridBytes
+            offset += numCapsules * _COMPILED_POSITION.size + numAgents * _COMPILED_AGENT.size
+            movesOffset = offset
+            offset += cells
+            visibilityOffset = offset
+            offset += 8 * cells
+            if len(data) != offset + textLength:
+                return None
+            layoutText = tuple(data[offset:].decode('utf-8').split('\n'))
+            if layoutText in LAYOUT_CACHE:
+                return LAYOUT_CACHE[layoutText]
+
+            layout = Layout.__new__(Layout)
+            layout.width, layout.height = width, height
+            offset = _COMPILED_HEADER.size
+            layout.walls = _unpackCells(width, height, data[offset:offset + gridBytes])
+            offset += gridBytes
+            layout.food = _unpackCells(width, height, data[offset:offset + gridBytes])
+            offset += gridBytes
+            layout.capsules = tuple(_COMPILED_POSITION.unpack_from(data, offset + i * _COMPILED_POSITION.size)
+                                    for i in range(numCapsules))
+            offset += numCapsules * _COMPILED_POSITION.size
+            agents = [_COMPILED_AGENT.unpack_from(data, offset + i * _COMPILED_AGENT.size) for i in range(numAgents)]
+            layout.agentPositions = tuple((isPacman, (x, y)) for isPacman, x, y in agents)
+            layout.numGhosts = numGhosts
+            layout.layoutText = layoutText
+            layout.totalFood = layout.food.count()
+            layout.moveTables = None
+            layout.moveMasks = data[movesOffset:movesOffset + cells]
+            key = (width, height, data[_COMPILED_HEADER.size:_COMPILED_HEADER.size + gridBytes])
+            if key not in VISIBILITY_MATRIX_CACHE:
+                VISIBILITY_MATRIX_CACHE[key] = VisibilityIndex.fromBytes(
+                    layout.walls, data[visibilityOffset:visibilityOffset + 8 * cells])
+            layout.visibility = VISIBILITY_MATRIX_CACHE[key]
+            layout._frozen = True
+    except (OSError, ValueError, struct.error):
+        return None
+    LAYOUT_CACHE[layoutText] = layout
+    return layout
+
+
+def _readMoveTables(width, height, moves):
+    "Rebuilds Layout.moveTables from the move bytes of a compiled layout"
+    from game import Actions
+    byMask = {}
+    legalActions, legalNeighbors = {}, {}
+    for cell, mask in enumerate(moves):
+        if not mask:
+            continue
+        if mask not in byMask:
+            directions = [(direction, vector) for bit, (direction, vector) in enumerate(Actions._directionsAsList)
+                          if mask & (1 << bit)]
+            byMask[mask] = (tuple([direction for direction, vector in directions]),
+                            [vector for direction, vector in directions])
+        actions, vectors = byMask[mask]
+        x, y = divmod(cell, height)
+        legalActions[(x, y)] = actions
+        legalNeighbors[(x, y)] = tuple([(x + dx, y + dy) for dx, dy in vectors])
+    return legalActions, legalNeighbors
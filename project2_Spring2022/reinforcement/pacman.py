@@ -43,6 +43,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearestPoint
 from util import manhattanDistance
 import util
@@ -77,15 +78,46 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
+    # static variables keep track of the states generateSuccessor has seen;
+    # see setExploredTracking.  Tracking is off unless something turns it on.
     explored = set()
+    exploredMode = 'off'
+    exploredLimit = None
+    exploredCount = 0
+
+    def setExploredTracking(mode='set', limit=None):
+        """
+        Chooses what generateSuccessor records about the states it sees:
+
+          'off'    nothing (the default, for normal and training runs)
+          'count'  only the number of successors generated, in exploredCount
+          'set'    the parent and child states in explored, as well as the
+                   count; with a limit, explored stops growing once it holds
+                   limit states, while exploredCount keeps counting
+
+        Graders that look at the explored states turn on 'set'.  Changing the
+        mode also clears what was recorded so far.
+        """
+        if mode not in ('off', 'count', 'set'):
+            raise Exception('Unknown explored tracking mode: ' + str(mode))
+        GameState.exploredMode = mode
+        GameState.exploredLimit = limit
+        GameState.explored = set()
+        GameState.exploredCount = 0
+    setExploredTracking = staticmethod(setExploredTracking)
 
     def getAndResetExplored():
         tmp = GameState.explored.copy()
         GameState.explored = set()
+        GameState.exploredCount = 0
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def getExploredCount():
+        "Returns the number of successors generated since tracking was last reset"
+        return GameState.exploredCount
+    getExploredCount = staticmethod(getExploredCount)
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -113,6 +145,7 @@ class GameState:
         # Let agent's logic deal with its action's effects on the board
         if agentIndex == 0:  # Pacman is moving
             state.data._eaten = [False for i in range(state.getNumAgents())]
+            state.data._ownsEaten = True
             PacmanRules.applyAction(state, action)
         else:                # A ghost is moving
             GhostRules.applyAction(state, action, agentIndex)
@@ -121,7 +154,7 @@ class GameState:
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
         else:
-            GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            GhostRules.decrementTimer(state.data.getAgentStateForUpdate(agentIndex))
 
         # Resolve multi-agent effects
         GhostRules.checkDeath(state, agentIndex)
@@ -129,8 +162,14 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploredMode != 'off':
+            GameState.exploredCount += 1
+            if GameState.exploredMode == 'set':
+                limit = GameState.exploredLimit
+                explored = GameState.explored
+                for tracked in (self, state):
+                    if limit is None or len(explored) < limit:
+                        explored.add(tracked)
         return state
 
     def getLegalPacmanActions(self):
@@ -240,6 +279,16 @@ class GameState:
         state.data = self.data.deepCopy()
         return state
 
+    def getReadOnlyView(self):
+        """
+        Returns a GameState that shares all its data with this one and cannot
+        be changed (see game.ReadOnlyGameStateData).  It is what Game hands
+        to agents with readOnlyState set, in place of a deepCopy.
+        """
+        state = GameState()
+        state.data = self.data.readOnlyView()
+        return state
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -348,7 +397,12 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions(state.getPacmanState().configuration, state.data.layout.walls)
+        conf = state.data.agentStates[0].configuration
+        if conf.isInteger():
+            possibleActions = state.data.layout.getLegalActions(conf.pos)
+            if possibleActions is not None:
+                return list(possibleActions)
+        return Actions.getPossibleActions(conf, state.data.layout.walls)
     getLegalActions = staticmethod(getLegalActions)
 
     def applyAction(state, action):
@@ -359,7 +413,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.getAgentStateForUpdate(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -389,11 +443,11 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+            state.data.getCapsulesForUpdate().remove(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getAgentStateForUpdate(index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -409,8 +463,14 @@ class GhostRules:
         reach a dead end, but can turn 90 degrees at intersections.
         """
         conf = state.getGhostState(ghostIndex).configuration
-        possibleActions = Actions.getPossibleActions(
-            conf, state.data.layout.walls)
+        possibleActions = None
+        if conf.isInteger():
+            possibleActions = state.data.layout.getLegalActions(conf.pos)
+        if possibleActions is not None:
+            possibleActions = list(possibleActions)
+        else:
+            possibleActions = Actions.getPossibleActions(
+                conf, state.data.layout.walls)
         reverse = Actions.reverseDirection(conf.direction)
         if Directions.STOP in possibleActions:
             possibleActions.remove(Directions.STOP)
@@ -425,7 +485,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getAgentStateForUpdate(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
@@ -437,8 +497,9 @@ class GhostRules:
     def decrementTimer(ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint(
-                ghostState.configuration.pos)
+            # A new Configuration, since configurations are shared between states
+            ghostState.configuration = Configuration(nearestPoint(
+                ghostState.configuration.pos), ghostState.configuration.direction)
         ghostState.scaredTimer = max(0, timer - 1)
     decrementTimer = staticmethod(decrementTimer)
 
@@ -449,12 +510,12 @@ class GhostRules:
                 ghostState = state.data.agentStates[index]
                 ghostPosition = ghostState.configuration.getPosition()
                 if GhostRules.canKill(pacmanPosition, ghostPosition):
-                    GhostRules.collide(state, ghostState, index)
+                    GhostRules.collide(state, state.data.getAgentStateForUpdate(index), index)
         else:
             ghostState = state.data.agentStates[agentIndex]
             ghostPosition = ghostState.configuration.getPosition()
             if GhostRules.canKill(pacmanPosition, ghostPosition):
-                GhostRules.collide(state, ghostState, agentIndex)
+                GhostRules.collide(state, state.data.getAgentStateForUpdate(agentIndex), agentIndex)
     checkDeath = staticmethod(checkDeath)
 
     def collide(state, ghostState, agentIndex):
@@ -463,7 +524,7 @@ class GhostRules:
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
             # Added for first-person
-            state.data._eaten[agentIndex] = True
+            state.data.getEatenForUpdate()[agentIndex] = True
         else:
             if not state.data._win:
                 state.data.scoreChange -= 500
@@ -554,6 +615,13 @@ def readCommand(argv):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--trackExplored', dest='trackExplored', type='choice', choices=['off', 'count', 'set'],
+                      help='Record the states agents generate: off, count or set (by default tracking is left as it is, which is off unless a grader turned it on)',
+                      default=None)
+    parser.add_option('--exploredLimit', dest='exploredLimit', type='int',
+                      help='The most states to keep when tracking explored states as a set', default=None)
+    parser.add_option('--readOnlyState', action='store_true', dest='readOnlyState',
+                      help='Trust the Pacman agent not to change the states it is given, and skip copying them', default=False)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -564,6 +632,9 @@ def readCommand(argv):
     if options.fixRandomSeed:
         random.seed('cs188')
 
+    if options.trackExplored is not None or options.exploredLimit is not None:
+        GameState.setExploredTracking(options.trackExplored or GameState.exploredMode, options.exploredLimit)
+
     # Choose a layout
     args['layout'] = layout.getLayout(options.layout)
     if args['layout'] == None:
@@ -579,6 +650,8 @@ def readCommand(argv):
         if 'numTraining' not in agentOpts:
             agentOpts['numTraining'] = options.numTraining
     pacman = pacmanType(**agentOpts)  # Instantiate Pacman with agentArgs
+    if options.readOnlyState:
+        pacman.readOnlyState = True
     args['pacman'] = pacman
 
     # Don't display training games
@@ -676,6 +676,8 @@ def pause():
 #
 import signal
 import time
+import queue
+import threading
 
 
 class TimeoutFunctionException(Exception):
@@ -693,25 +695,97 @@ class TimeoutFunction:
 
     def __call__(self, *args, **keyArgs):
         # If we have SIGALRM signal, use it to cause an exception if and
-        # when this function runs too long.  Otherwise check the time taken
-        # after the method has returned, and throw an exception then.
-        if hasattr(signal, 'SIGALRM'):
+        # when this function runs too long.  Signal handlers can only be
+        # installed from the main thread, so anywhere else the function runs
+        # on a TimeoutWorker instead.
+        if not hasattr(signal, 'SIGALRM'):
+            startTime = time.monotonic()
+            result = self.function(*args, **keyArgs)
+            timeElapsed = time.monotonic() - startTime
+            if timeElapsed >= self.timeout:
+                self.handle_timeout(None, None)
+        elif threading.current_thread() is not threading.main_thread():
+            worker = TimeoutWorker()
+            try:
+                result = worker.call(self.timeout, self.function, *args, **keyArgs)
+            finally:
+                worker.close()
+        else:
             old = signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.timeout)
+            signal.setitimer(signal.ITIMER_REAL, self.timeout)
             try:
                 result = self.function(*args, **keyArgs)
             finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
                 signal.signal(signal.SIGALRM, old)
-            signal.alarm(0)
-        else:
-            startTime = time.time()
-            result = self.function(*args, **keyArgs)
-            timeElapsed = time.time() - startTime
-            if timeElapsed >= self.timeout:
-                self.handle_timeout(None, None)
         return result
 
 
+class TimeoutWorker:
+    """
+    Runs functions on a persistent worker thread and waits for each one with
+    a deadline, without signals.  Unlike TimeoutFunction this works from any
+    thread, takes fractional timeouts and can be reused for every call an
+    agent makes during a game.
+
+    Python cannot stop a running thread, so a call that misses its deadline
+    keeps running in the background; the worker lets go of that thread and
+    starts a fresh one for the next call.
+    """
+
+    def __init__(self, name='TimeoutWorker'):
+        self.name = name
+        self.thread = None
+        self.requests = None
+
+    def _start(self):
+        self.requests = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._serve, args=(self.requests,),
+                                       name=self.name, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def _serve(requests):
+        while True:
+            request = requests.get()
+            if request is None:
+                return
+            function, args, keyArgs, done, outcome = request
+            try:
+                outcome.append(function(*args, **keyArgs))
+            except BaseException as e:
+                outcome.append(e)
+                outcome.append(True)
+            done.set()
+
+    def call(self, timeout, function, *args, **keyArgs):
+        """
+        Calls function(*args, **keyArgs) on the worker thread and returns its
+        result, or raises what it raised.  Raises TimeoutFunctionException if
+        it has not finished after timeout seconds (None waits forever).
+        """
+        if timeout is not None and timeout <= 0:
+            raise TimeoutFunctionException()
+        if self.thread is None:
+            self._start()
+        done = threading.Event()
+        outcome = []
+        self.requests.put((function, args, keyArgs, done, outcome))
+        if not done.wait(timeout):
+            # Abandon the busy thread; it exits once the call returns
+            self.requests.put(None)
+            self.thread = None
+            raise TimeoutFunctionException()
+        if len(outcome) == 2:
+            raise outcome[0]
+        return outcome[0]
+
+    def close(self):
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread = None
+
+
 _ORIGINAL_STDOUT = None
 _ORIGINAL_STDERR = None
 _MUTED = False
@@ -0,0 +1,254 @@
+# batchSearch.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for 
+# educational purposes provided that (1) you do not distribute or publish 
+# solutions, (2) you retain this notice, and (3) you provide clear 
+# attribution to UC Berkeley, including a link to 
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero 
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and 
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Runs many searches at once on a pool of worker processes.
+
+A SearchJob names a problem factory (a function returning a fresh
+SearchProblem), a search function and, optionally, a heuristic.  runBatch
+hands the jobs to a multiprocessing pool and yields a SearchResult for each
+one as soon as it finishes, so results stream in while the slower jobs are
+still running.  Every job has its own time limit, enforced inside the worker
+with util.TimeoutFunction.
+
+Jobs are sent to the workers by pickling, so the factory, search function and
+heuristic have to be module level functions (functools.partial of one is
+fine).  The search function may also be given by name, as on the SearchAgent
+command line.
+
+Example:
+  jobs = [SearchJob('puzzle %d' % i, functools.partial(eightPuzzleProblem, i), 'astar',
+                    eightpuzzle.patternDatabaseHeuristic) for i in range(100)]
+  for result in runBatch(jobs, timeout=10):
+      print(result)
+
+From the command line:
+  python batchSearch.py -n 100 -f astar --heuristic patternDatabaseHeuristic
+  python batchSearch.py -l mediumMaze,bigMaze,mediumCorners -f bfs -p 4
+"""
+
+import sys
+import math
+import random
+import functools
+import multiprocessing
+
+import util
+import search
+
+
+class SearchJob:
+    """
+    One search to run: problemFactory() builds the problem, which is then
+    solved with searchFunction (a function or its name in search.py), passing
+    heuristic and any extra keyword arguments.
+    """
+
+    def __init__(self, name, problemFactory, searchFunction, heuristic=None, **searchArgs):
+        self.name = name
+        self.problemFactory = problemFactory
+        self.searchFunction = searchFunction
+        self.heuristic = heuristic
+        self.searchArgs = searchArgs
+
+
+class SearchResult:
+    """
+    What happened to one SearchJob.  actions is None if no path was found,
+    the job timed out (timedOut) or raised an exception (error holds the
+    message).  stats holds the search.SearchStats counters as a dict.
+    """
+
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+        self.actions = None
+        self.cost = None
+        self.stats = None
+        self.timedOut = False
+        self.error = None
+        self.wallTime = 0.0
+
+    def __str__(self):
+        if self.timedOut:
+            outcome = 'timed out'
+        elif self.error is not None:
+            outcome = 'failed: ' + self.error
+        elif self.actions is None:
+            outcome = 'no path'
+        else:
+            outcome = 'cost %s, %d expanded' % (self.cost, self.stats['expanded'])
+        return '%s: %s in %.2f seconds' % (self.name, outcome, self.wallTime)
+
+
+def runJob(index, job, timeout=None):
+    "Runs one SearchJob in the current process and returns its SearchResult"
+    result = SearchResult(index, job.name)
+    searchFunction = job.searchFunction
+    if isinstance(searchFunction, str):
+        searchFunction = getattr(search, searchFunction)
+    searchArgs = dict(job.searchArgs)
+    if job.heuristic is not None:
+        searchArgs['heuristic'] = job.heuristic
+
+    def solve():
+        problem = job.problemFactory()
+        actions, stats = search.runSearch(searchFunction, problem, **searchArgs)
+        if actions is not None:
+            result.cost = problem.getCostOfActions(actions)
+        return actions, stats
+
+    if timeout:
+        # signal.alarm only takes whole seconds
+        solve = util.TimeoutFunction(solve, int(math.ceil(timeout)))
+    util.mutePrint()
+    try:
+        result.actions, stats = solve()
+        result.stats = stats.asDict()
+        result.wallTime = stats.wallTime
+    except util.TimeoutFunctionException:
+        result.timedOut = True
+        result.wallTime = timeout
+    except Exception as e:
+        result.error = '%s: %s' % (type(e).__name__, e)
+    finally:
+        util.unmutePrint()
+    return result
+
+
+def _runJobInWorker(arguments):
+    return runJob(*arguments)
+
+
+def runBatch(jobs, processes=None, timeout=None):
+    """
+    Runs the jobs on a pool of processes (one per core by default) and yields
+    their SearchResults in the order they finish.  Each result's index is the
+    position of its job in jobs.  With processes=1 the jobs run one after
+    another in this process, which is easier to debug.
+    """
+    arguments = [(index, job, timeout) for index, job in enumerate(jobs)]
+    if processes == 1:
+        for argument in arguments:
+            yield _runJobInWorker(argument)
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap_unordered(_runJobInWorker, arguments):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def runBatchInOrder(jobs, processes=None, timeout=None):
+    "Returns the SearchResults of runBatch as a list in the order of jobs"
+    results = list(runBatch(jobs, processes, timeout))
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+# Problem factories for the command line; they only take picklable arguments
+
+def eightPuzzleProblem(seed, moves=30, packed=True):
+    "The eight puzzle made by createRandomEightPuzzle(moves) with the random seed"
+    import eightpuzzle
+    random.seed(seed)
+    puzzleClass = eightpuzzle.EightPuzzleState
+    if packed:
+        puzzleClass = eightpuzzle.PackedEightPuzzleState
+    return eightpuzzle.EightPuzzleSearchProblem(eightpuzzle.createRandomEightPuzzle(moves, puzzleClass))
+
+
+def layoutProblem(layoutName, problemName='PositionSearchProblem'):
+    "The problem of the named type (from searchAgents.py) on a layout from layouts/"
+    import layout
+    import pacman
+    import searchAgents
+    board = layout.getLayout(layoutName)
+    if board is None:
+        raise Exception('The layout ' + layoutName + ' cannot be found')
+    state = pacman.GameState()
+    state.initialize(board, 0)
+    return getattr(searchAgents, problemName)(state)
+
+
+def problemForLayout(layoutName):
+    "Guesses the problem type from the layout name, like searchBenchmark does"
+    if layoutName.endswith('Corners'):
+        return 'CornersProblem'
+    if layoutName.endswith('Search'):
+        return 'FoodSearchProblem'
+    return 'PositionSearchProblem'
+
+
+def getHeuristic(name):
+    import searchAgents
+    import eightpuzzle
+    for module in (searchAgents, eightpuzzle, search):
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(name + ' is not a heuristic in searchAgents.py, eightpuzzle.py or search.py.')
+
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__.strip().split('\n\n')[0])
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='comma separated layouts to search; the problem type follows from the name')
+    parser.add_option('-n', '--puzzles', dest='puzzles', type='int', default=0,
+                      help='number of random eight puzzles to solve')
+    parser.add_option('-m', '--moves', dest='moves', type='int', default=30,
+                      help='random moves used to make each eight puzzle (default: %default)')
+    parser.add_option('-f', '--function', dest='function', default='bfs',
+                      help='search function to use (default: %default)')
+    parser.add_option('--heuristic', dest='heuristic', default=None,
+                      help='heuristic to pass to the search function')
+    parser.add_option('-p', '--processes', dest='processes', type='int', default=None,
+                      help='worker processes (default: one per core)')
+    parser.add_option('-t', '--timeout', dest='timeout', type='float', default=60,
+                      help='seconds allowed for each job (default: %default)')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    heuristic = None
+    if options.heuristic is not None:
+        heuristic = getHeuristic(options.heuristic)
+    jobs = []
+    if options.layouts is not None:
+        for name in options.layouts.split(','):
+            factory = functools.partial(layoutProblem, name, problemForLayout(name))
+            jobs.append(SearchJob(name, factory, options.function, heuristic))
+    for seed in range(options.puzzles):
+        factory = functools.partial(eightPuzzleProblem, seed, options.moves)
+        jobs.append(SearchJob('eight puzzle %d' % seed, factory, options.function, heuristic))
+    if not jobs:
+        print('Nothing to run: give some layouts (-l) or a number of eight puzzles (-n)')
+        sys.exit(1)
+
+    processes = options.processes or multiprocessing.cpu_count()
+    print('Running %d jobs on %d processes' % (len(jobs), processes))
+    failures = 0
+    for result in runBatch(jobs, processes, options.timeout):
+        print(result)
+        if result.actions is None:
+            failures += 1
+    print('%d of %d jobs found a path' % (len(jobs) - failures, len(jobs)))
@@ -0,0 +1,166 @@
+# distanceOracle.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+This file contains a DistanceOracle, which holds the maze distance between
+every pair of open cells of a layout.
+
+Every open cell gets an id (cells are numbered column by column, the order of
+walls.asList(False)) and the distances live in one flat int16 array, so the
+whole table for bigMaze is about a megabyte.  It is filled in with one BFS per
+cell.
+
+Tables are saved under .distancecache/, named by a hash of the walls, and are
+memory-mapped instead of recomputed the next time the same layout is used.
+
+Example:
+oracle = getOracle(gameState.getWalls())
+oracle.getDistance( (1,1), (10,10) )
+"""
+
+import os
+import sys
+import mmap
+import hashlib
+from array import array
+from collections import deque
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.distancecache')
+CACHE_VERSION = 2
+# Larger than any maze distance, so closest-cell searches never pick an unreachable one
+UNREACHABLE = 32767
+# What the dictionary style lookups return instead, as the old distance dicts did
+DICT_UNREACHABLE = 1000000000
+
+# One oracle per walls grid for the life of the process
+_ORACLES = {}
+
+
+def getOracle(walls, cacheDir=CACHE_DIR):
+    """
+    Returns the DistanceOracle for a walls Grid, building or loading it the
+    first time the walls are seen in this process.
+    """
+    if walls not in _ORACLES:
+        _ORACLES[walls] = DistanceOracle(walls, cacheDir)
+    return _ORACLES[walls]
+
+
+def layoutKey(walls):
+    "Returns a hex digest identifying a walls Grid"
+    bits = ''.join(['1' if cell else '0' for column in walls.data for cell in column])
+    text = '%d:%d:%d:%s:%s' % (CACHE_VERSION, walls.width, walls.height, sys.byteorder, bits)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class DistanceOracle:
+    """
+    All-pairs maze distances for one walls Grid.
+
+    Lookups are also available dictionary style, oracle[(pos1, pos2)] and
+    (pos1, pos2) in oracle, so it can stand in for a dict of distances keyed
+    by pairs of positions.  Like those dicts, it holds every pair of open
+    cells and gives DICT_UNREACHABLE for pairs with no path between them.
+    """
+
+    def __init__(self, walls, cacheDir=CACHE_DIR):
+        self.walls = walls
+        self.cells = walls.asList(False)
+        self.cellIds = dict([(cell, i) for i, cell in enumerate(self.cells)])
+        self.numCells = len(self.cells)
+        self.key = layoutKey(walls)
+        self.path = None
+        if cacheDir is not None:
+            self.path = os.path.join(cacheDir, self.key + '.dist')
+        self.distances = self._load()
+        if self.distances is None:
+            self.distances = self._compute()
+            self._save()
+
+    def getDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open cells, or UNREACHABLE if
+        there is no path between them.
+        """
+        n = self.numCells
+        return self.distances[self.cellIds[pos1] * n + self.cellIds[pos2]]
+
+    def getDistancesFrom(self, pos):
+        "Returns a dict from every reachable open cell to its distance from pos"
+        n = self.numCells
+        start = self.cellIds[pos] * n
+        row = self.distances[start:start + n]
+        return dict([(cell, d) for cell, d in zip(self.cells, row) if d != UNREACHABLE])
+
+    def __getitem__(self, key):
+        distance = self.getDistance(key[0], key[1])
+        if distance == UNREACHABLE:
+            return DICT_UNREACHABLE
+        return distance
+
+    def __contains__(self, key):
+        return key[0] in self.cellIds and key[1] in self.cellIds
+
+    def _neighborTable(self):
+        neighbors = []
+        for x, y in self.cells:
+            ids = []
+            for next in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                if next in self.cellIds:
+                    ids.append(self.cellIds[next])
+            neighbors.append(ids)
+        return neighbors
+
+    def _compute(self):
+        n = self.numCells
+        neighbors = self._neighborTable()
+        distances = array('h', [UNREACHABLE]) * (n * n)
+        for source in range(n):
+            row = source * n
+            distances[row + source] = 0
+            fringe = deque([source])
+            while fringe:
+                cell = fringe.popleft()
+                nextDistance = distances[row + cell] + 1
+                for next in neighbors[cell]:
+                    if distances[row + next] == UNREACHABLE:
+                        distances[row + next] = nextDistance
+                        fringe.append(next)
+        return distances
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size != 2 * self.numCells * self.numCells or self.numCells == 0:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast('h')
+
+    def _save(self):
+        if self.path is None or self.numCells == 0:
+            return
+        # Write to a temporary file first so a half-written table is never loaded
+        temp = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            with open(temp, 'wb') as f:
+                self.distances.tofile(f)
+            os.replace(temp, self.path)
+        except OSError:
+            # The cache is only an optimization; keep the table in memory
+            if os.path.exists(temp):
+                os.remove(temp)
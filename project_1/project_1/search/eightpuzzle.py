@@ -14,6 +14,8 @@
 
 import search
 import random
+import os
+from array import array
 
 # Module Classes
 
@@ -163,6 +165,10 @@ class EightPuzzleState:
     def __hash__(self):
         return hash(str(self.cells))
 
+    def getTiles(self):
+        "Returns the numbers row by row as a tuple, the same order as the constructor takes"
+        return tuple([number for row in self.cells for number in row])
+
     def __getAsciiString(self):
         """
           Returns a display string for the maze
@@ -183,6 +189,87 @@ class EightPuzzleState:
     def __str__(self):
         return self.__getAsciiString()
 
+
+# Move tables for PackedEightPuzzleState: the moves open to the blank in each
+# cell, in the order legalMoves lists them, and the cell each move swaps with
+_MOVE_NAMES = {}
+_MOVE_TARGETS = {}
+for _cell in range(9):
+    _row, _col = divmod(_cell, 3)
+    _targets = {}
+    if _row != 0: _targets['up'] = _cell - 3
+    if _row != 2: _targets['down'] = _cell + 3
+    if _col != 0: _targets['left'] = _cell - 1
+    if _col != 2: _targets['right'] = _cell + 1
+    _MOVE_NAMES[_cell] = [move for move in ['up', 'down', 'left', 'right'] if move in _targets]
+    _MOVE_TARGETS[_cell] = _targets
+del _cell, _row, _col, _targets
+
+_PACKED_GOAL = sum([number << (4 * number) for number in range(9)])
+
+
+class PackedEightPuzzleState:
+    """
+    An EightPuzzleState kept in a single int, 4 bits per cell (cell i in bits
+    4i to 4i+3, row by row), so a move is a couple of shifts and hashing is
+    free.  It has the same methods as EightPuzzleState and can be used with
+    EightPuzzleSearchProblem in its place.
+
+    >>> PackedEightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left').isGoal()
+    True
+    >>> PackedEightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
+    ['down', 'left', 'right']
+    """
+    __slots__ = ('value', 'blank')
+
+    def __init__(self, numbers=None, value=0, blank=0):
+        if numbers is not None:
+            value = 0
+            for cell, number in enumerate(numbers):
+                value |= number << (4 * cell)
+            blank = list(numbers).index(0)
+        self.value = value
+        self.blank = blank
+
+    def isGoal(self):
+        return self.value == _PACKED_GOAL
+
+    def legalMoves(self):
+        return list(_MOVE_NAMES[self.blank])
+
+    def result(self, move):
+        if move not in _MOVE_TARGETS[self.blank]:
+            raise Exception('Illegal Move')
+        cell = _MOVE_TARGETS[self.blank][move]
+        number = (self.value >> (4 * cell)) & 15
+        # The blank's nibble is 0, so moving the number is one subtraction and one addition
+        value = self.value - (number << (4 * cell)) + (number << (4 * self.blank))
+        return PackedEightPuzzleState(value=value, blank=cell)
+
+    def getTiles(self):
+        return tuple([(self.value >> (4 * cell)) & 15 for cell in range(9)])
+
+    def getCells(self):
+        "Returns the numbers as a 3x3 list of lists, like EightPuzzleState.cells"
+        tiles = self.getTiles()
+        return [list(tiles[row * 3:row * 3 + 3]) for row in range(3)]
+
+    cells = property(getCells)
+
+    def getBlankLocation(self):
+        return divmod(self.blank, 3)
+
+    blankLocation = property(getBlankLocation)
+
+    def __eq__(self, other):
+        return other is not None and self.value == other.value
+
+    def __hash__(self):
+        return self.value
+
+    def __str__(self):
+        return str(EightPuzzleState(list(self.getTiles())))
+
 # TODO: Implement The methods in this class
 
 class EightPuzzleSearchProblem(search.SearchProblem):
@@ -196,7 +283,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         self.puzzle = puzzle
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -228,14 +315,15 @@ EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 2, 5, 7, 6, 8, 0, 4, 3],
                      [0, 3, 1, 6, 8, 2, 7, 5, 4]]
 
-def loadEightPuzzle(puzzleNumber):
+def loadEightPuzzle(puzzleNumber, puzzleClass=EightPuzzleState):
     """
       puzzleNumber: The number of the eight puzzle to load.
 
       Returns an eight puzzle object generated from one of the
       provided puzzles in EIGHT_PUZZLE_DATA.
 
-      puzzleNumber can range from 0 to 5.
+      puzzleNumber can range from 0 to 5.  puzzleClass is EightPuzzleState
+      or PackedEightPuzzleState.
 
       >>> print(loadEightPuzzle(0))
       -------------
@@ -246,22 +334,286 @@ def loadEightPuzzle(puzzleNumber):
       | 6 | 7 | 8 |
       -------------
     """
-    return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
+    return puzzleClass(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, puzzleClass=EightPuzzleState):
     """
       moves: number of random moves to apply
+      puzzleClass: EightPuzzleState or PackedEightPuzzleState
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = puzzleClass([0,1,2,3,4,5,6,7,8])
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+class NPuzzleState:
+    """
+    A sliding puzzle on a size x size board, so size 3 is the eight puzzle
+    and size 4 the fifteen puzzle.  It works like EightPuzzleState, with the
+    same moves and the same goal (the blank in the top left corner, then the
+    numbers in order), but the numbers are kept in a flat tuple so states are
+    cheap to copy and hash.
+
+    >>> NPuzzleState(3, [1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left').isGoal()
+    True
+    """
+
+    def __init__(self, size, tiles, blank=None):
+        self.size = size
+        self.tiles = tuple(tiles)
+        if blank is None:
+            blank = self.tiles.index(0)
+        self.blank = blank
+        self.hashValue = hash(self.tiles)
+
+    def isGoal(self):
+        for cell, number in enumerate(self.tiles):
+            if cell != number:
+                return False
+        return True
+
+    def legalMoves(self):
+        moves = []
+        row, col = divmod(self.blank, self.size)
+        if(row != 0):
+            moves.append('up')
+        if(row != self.size - 1):
+            moves.append('down')
+        if(col != 0):
+            moves.append('left')
+        if(col != self.size - 1):
+            moves.append('right')
+        return moves
+
+    def result(self, move):
+        if move == 'up':
+            cell = self.blank - self.size
+        elif move == 'down':
+            cell = self.blank + self.size
+        elif move == 'left':
+            cell = self.blank - 1
+        elif move == 'right':
+            cell = self.blank + 1
+        else:
+            raise Exception('Illegal Move')
+        tiles = list(self.tiles)
+        tiles[self.blank], tiles[cell] = tiles[cell], 0
+        return NPuzzleState(self.size, tiles, cell)
+
+    def getTiles(self):
+        return self.tiles
+
+    def __eq__(self, other):
+        return other is not None and self.tiles == other.tiles
+
+    def __hash__(self):
+        return self.hashValue
+
+    def __str__(self):
+        width = len(str(self.size * self.size - 1))
+        horizontalLine = '-' * ((width + 3) * self.size + 1)
+        lines = [horizontalLine]
+        for row in range(self.size):
+            numbers = self.tiles[row * self.size:(row + 1) * self.size]
+            lines.append('|' + ''.join([' %s |' % (str(number or ' ').rjust(width)) for number in numbers]))
+            lines.append(horizontalLine)
+        return '\n'.join(lines)
+
+
+class NPuzzleSearchProblem(EightPuzzleSearchProblem):
+    """
+      A SearchProblem for NPuzzleStates of any size.  Every move costs 1.
+    """
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        self.heuristicInfo = {}
+
+
+def createRandomNPuzzle(size=4, moves=100):
+    """
+      Creates a random size x size puzzle by applying 'moves' random moves to
+      a solved puzzle, like createRandomEightPuzzle.
+    """
+    puzzle = NPuzzleState(size, range(size * size))
+    for i in range(moves):
+        puzzle = puzzle.result(random.choice(puzzle.legalMoves()))
+    return puzzle
+
+
+# Pattern databases
+
+PATTERN_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.patterncache')
+PATTERN_CACHE_VERSION = 2
+UNKNOWN = 255
+
+# Disjoint groups of tiles whose databases add up to an admissible heuristic
+DEFAULT_PATTERNS = {
+    3: [(1, 2, 3, 4), (5, 6, 7, 8)],
+    4: [(1, 2, 3, 6, 7), (4, 5, 8, 9, 12), (10, 11, 13, 14, 15)],
+}
+
+# One PatternDatabase per (size, pattern) for the life of the process
+_DATABASES = {}
+
+
+class PatternDatabase:
+    """
+    The fewest moves of a group of tiles (the pattern) needed to bring those
+    tiles home from any placement and blank cell, where moves of the other
+    tiles are free.  Because only the pattern's own moves are counted,
+    databases for disjoint patterns can be added together and stay admissible.
+    Because the blank is part of the key, one move changes a database's value
+    by at most one, and only for the pattern of the tile that moved, so the
+    sum is also consistent and A* without reopening stays optimal.
+
+    The table has one byte per placement of the pattern tiles and the blank,
+    indexed by sum(position of pattern[i] * cells ** i) * cells + blank, so
+    the 5-tile databases for the fifteen puzzle take 16 megabytes each.  It is
+    built by a breadth first search backwards from the goal and saved under
+    .patterncache/, to be read back the next time instead of rebuilt.
+    """
+
+    def __init__(self, size, pattern, cacheDir=PATTERN_CACHE_DIR):
+        self.size = size
+        self.pattern = tuple(pattern)
+        self.cells = size * size
+        self.weights = [self.cells ** i for i in range(len(self.pattern))]
+        self.path = None
+        if cacheDir is not None:
+            name = 'pdb-v%d-%d-%s.bin' % (PATTERN_CACHE_VERSION, size, '-'.join([str(tile) for tile in self.pattern]))
+            self.path = os.path.join(cacheDir, name)
+        self.table = self._load()
+        if self.table is None:
+            self.table = self._build()
+            self._save()
+
+    def getMoves(self, positions, blank):
+        """
+        positions: where each tile of the pattern is, as a list of cell numbers
+        in pattern order; blank: the cell of the blank
+        """
+        index = 0
+        for position, weight in zip(positions, self.weights):
+            index += position * weight
+        return self.table[index * self.cells + blank]
+
+    def _neighborTable(self):
+        size = self.size
+        neighbors = []
+        for cell in range(self.cells):
+            row, col = divmod(cell, size)
+            ids = []
+            if row > 0: ids.append(cell - size)
+            if row < size - 1: ids.append(cell + size)
+            if col > 0: ids.append(cell - 1)
+            if col < size - 1: ids.append(cell + 1)
+            neighbors.append(ids)
+        return neighbors
+
+    def _build(self):
+        """
+        A 0-1 breadth first search over (pattern placement, blank cell): the
+        blank swapping with a pattern tile costs 1, with any other tile 0.  Each
+        cost layer is finished, following the free moves, before the next one
+        starts, so the first time a state is settled is at its lowest cost.
+        """
+        cells, weights = self.cells, self.weights
+        neighbors = self._neighborTable()
+        table = bytearray([UNKNOWN]) * (cells ** (len(self.pattern) + 1))
+        start = 0
+        for tile, weight in zip(self.pattern, weights):
+            start += tile * weight
+        depth = 0
+        frontier = [start * cells]   # the blank starts in cell 0
+        while frontier:
+            stack, frontier = frontier, []
+            while stack:
+                state = stack.pop()
+                if table[state] != UNKNOWN:
+                    continue
+                table[state] = depth
+                code, blank = divmod(state, cells)
+                occupied = {}
+                rest = code
+                for i in range(len(weights)):
+                    rest, position = divmod(rest, cells)
+                    occupied[position] = i
+                for cell in neighbors[blank]:
+                    if cell in occupied:
+                        next = (code + (blank - cell) * weights[occupied[cell]]) * cells + cell
+                        if table[next] == UNKNOWN:
+                            frontier.append(next)
+                    else:
+                        next = code * cells + cell
+                        if table[next] == UNKNOWN:
+                            stack.append(next)
+            depth += 1
+        return table
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            table = f.read()
+        if len(table) != self.cells ** (len(self.pattern) + 1):
+            return None
+        return table
+
+    def _save(self):
+        if self.path is None:
+            return
+        temp = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            with open(temp, 'wb') as f:
+                f.write(self.table)
+            os.replace(temp, self.path)
+        except OSError:
+            # The cache is only an optimization; keep the table in memory
+            if os.path.exists(temp):
+                os.remove(temp)
+
+
+def getPatternDatabases(size, patterns=None):
+    "Returns the PatternDatabases for a puzzle size, loading or building each one the first time"
+    if patterns is None:
+        patterns = DEFAULT_PATTERNS[size]
+    databases = []
+    for pattern in patterns:
+        key = (size, tuple(pattern))
+        if key not in _DATABASES:
+            _DATABASES[key] = PatternDatabase(size, pattern)
+        databases.append(_DATABASES[key])
+    return databases
+
+
+def patternDatabaseHeuristic(state, problem=None):
+    """
+    The sum of the disjoint pattern databases for the state's puzzle size.
+    Works for EightPuzzleStates as well as NPuzzleStates of size 3 or 4.
+
+    >>> patternDatabaseHeuristic(NPuzzleState(3, [1, 0, 2, 3, 4, 5, 6, 7, 8]))
+    1
+    """
+    tiles = state.getTiles()
+    cells = len(tiles)
+    size = int(round(cells ** 0.5))
+    databases = getPatternDatabases(size)
+    where = array('b', [0]) * cells
+    for cell, tile in enumerate(tiles):
+        where[tile] = cell
+    total = 0
+    for database in databases:
+        total += database.getMoves([where[tile] for tile in database.pattern], where[0])
+    return total
+
+
 if __name__ == '__main__':
     puzzle = createRandomEightPuzzle(25)
     print('A random puzzle:')
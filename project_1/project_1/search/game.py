@@ -279,6 +279,120 @@ def reconstituteGrid(bitRep):
     width, height = bitRep[:2]
     return Grid(width, height, bitRepresentation= bitRep[2:])
 
+class BitGrid:
+    """
+    An immutable boolean grid packed into a single Python int, with bit
+    x * height + y holding cell (x,y) (the same cell order as Grid.packBits).
+
+    It is meant for search states that carry a grid, like the food in a
+    FoodSearchProblem: clearing a cell builds a new BitGrid from the old one
+    in O(1), and count() and hashing are O(1) because the count and a
+    Zobrist hash are updated along with the bits.  Cells are read with
+    grid[x][y] as with a Grid, and asList() and count() work the same way.
+    """
+    _zobristTables = {}
+
+    def __init__(self, width, height, bits=0, count=None, hashValue=None):
+        self.width = width
+        self.height = height
+        self.bits = bits
+        self._zobrist = BitGrid._zobristTable(width, height)
+        if count is None:
+            count = bin(bits).count('1')
+        self._count = count
+        if hashValue is None:
+            hashValue = 0
+            for i in self.cellIndices():
+                hashValue ^= self._zobrist[i]
+        self._hash = hashValue
+
+    @staticmethod
+    def fromGrid(grid):
+        "Packs a Grid into a BitGrid"
+        bits = 0
+        for x in range(grid.width):
+            column = grid[x]
+            for y in range(grid.height):
+                if column[y]:
+                    bits |= 1 << (x * grid.height + y)
+        return BitGrid(grid.width, grid.height, bits)
+
+    @staticmethod
+    def _zobristTable(width, height):
+        key = (width, height)
+        if key not in BitGrid._zobristTables:
+            rand = random.Random(width * 7919 + height)
+            BitGrid._zobristTables[key] = [rand.getrandbits(61) for i in range(width * height)]
+        return BitGrid._zobristTables[key]
+
+    def cellIndices(self):
+        "Yields the bit index x * height + y of every set cell, lowest first"
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def isSet(self, x, y):
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def __getitem__(self, x):
+        return _BitGridColumn(self.bits >> (x * self.height), self.height)
+
+    def without(self, x, y):
+        "Returns this grid with cell (x,y) cleared; returns self if it is already clear"
+        index = x * self.height + y
+        if not (self.bits >> index) & 1:
+            return self
+        return BitGrid(self.width, self.height, self.bits & ~(1 << index),
+                       self._count - 1, self._hash ^ self._zobrist[index])
+
+    def count(self, item=True):
+        if item:
+            return self._count
+        return self.width * self.height - self._count
+
+    def asList(self, key=True):
+        if not key:
+            return self.toGrid().asList(False)
+        return [(i // self.height, i % self.height) for i in self.cellIndices()]
+
+    def toGrid(self):
+        "Unpacks this BitGrid into a (mutable) Grid"
+        g = Grid(self.width, self.height)
+        for i in self.cellIndices():
+            g[i // self.height][i % self.height] = True
+        return g
+
+    def copy(self):
+        # BitGrids are immutable, so copies can share
+        return self
+
+    def deepCopy(self):
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, BitGrid): return False
+        return self._hash == other._hash and self.bits == other.bits and self.height == other.height
+
+    def __hash__(self):
+        return self._hash
+
+    def __str__(self):
+        return str(self.toGrid())
+
+class _BitGridColumn:
+    "One column of a BitGrid, so that grid[x][y] works as it does on a Grid"
+    __slots__ = ('bits', 'height')
+
+    def __init__(self, bits, height):
+        self.bits = bits
+        self.height = height
+
+    def __getitem__(self, y):
+        if y < 0 or y >= self.height: raise IndexError(y)
+        return (self.bits >> y) & 1 == 1
+
 ####################################
 # Parts you shouldn't have to read #
 ####################################
@@ -26,7 +26,8 @@ class Layout:
     A Layout manages the static information about the game board.
     """
 
-    def __init__(self, layoutText):
+    def __init__(self, layoutText, name=None):
+        self.name = name    # the name the layout was loaded under, if any
         self.width = len(layoutText[0])
         self.height= len(layoutText)
         self.walls = Grid(self.width, self.height, False)
@@ -91,7 +92,7 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        return Layout(self.layoutText[:], self.name)
 
     def processLayoutText(self, layoutText):
         """
@@ -146,5 +147,7 @@ def getLayout(name, back = 2):
 def tryToLoad(fullname):
     if(not os.path.exists(fullname)): return None
     f = open(fullname)
-    try: return Layout([line.strip() for line in f])
+    name = os.path.basename(fullname)
+    if name.endswith('.lay'): name = name[:-len('.lay')]
+    try: return Layout([line.strip() for line in f], name)
     finally: f.close()
@@ -19,6 +19,11 @@ by Pacman agents (in searchAgents.py).
 """
 
 from hashlib import new
+from collections import OrderedDict
+import heapq
+import itertools
+import json
+import time
 import util
 
 
@@ -66,6 +71,85 @@ class SearchProblem:
         util.raiseNotDefined()
 
 
+class SearchStats:
+    """
+    Counters for one run of a search function.  Every search function in
+    this file stores one on the problem as _searchStats and keeps it up to
+    date while it runs:
+
+      expanded        states whose successors were generated
+      generated       successors generated
+      duplicates      successors leading to a state the search had already
+                      reached (visited, or known to the frontier for the
+                      searches that keep track of it)
+      peakFrontier    largest frontier size
+      peakVisited     largest number of states held in the visited set (or
+                      in memory, for the memory-bounded searches)
+      heuristicCalls  heuristic evaluations
+      wallTime        seconds spent in the search; only set by runSearch
+      stopReason      why a search that ran out of budget gave up, or None
+
+    Use runSearch to time a search and toJson to export the counters.
+    """
+
+    FIELDS = ('expanded', 'generated', 'duplicates', 'peakFrontier', 'peakVisited', 'heuristicCalls', 'wallTime',
+              'stopReason')
+
+    def __init__(self):
+        for field in SearchStats.FIELDS:
+            setattr(self, field, 0)
+        self.wallTime = 0.0
+        self.stopReason = None
+
+    @staticmethod
+    def attach(problem):
+        "Returns the SearchStats stored on problem, after creating a new one if runSearch didn't"
+        stats = getattr(problem, '_searchStats', None)
+        if stats is None or stats.expanded or stats.generated:
+            stats = SearchStats()
+            problem._searchStats = stats
+        return stats
+
+    def countCalls(self, heuristic):
+        "Returns heuristic wrapped so that every call is counted"
+        def counted(state, problem=None):
+            self.heuristicCalls += 1
+            return heuristic(state, problem)
+        return counted
+
+    def frontier(self, size):
+        if size > self.peakFrontier:
+            self.peakFrontier = size
+
+    def visited(self, size):
+        if size > self.peakVisited:
+            self.peakVisited = size
+
+    def asDict(self):
+        return dict([(field, getattr(self, field)) for field in SearchStats.FIELDS])
+
+    def toJson(self, **context):
+        "Returns the counters, plus any context given (layout, search function, ...), as one line of JSON"
+        record = dict(context)
+        record.update(self.asDict())
+        return json.dumps(record, sort_keys=True)
+
+
+def runSearch(searchFunction, problem, *args, **keyArgs):
+    """
+    Runs searchFunction on problem and returns (actions, SearchStats), with
+    the wall time of the run filled in.
+    """
+    stats = SearchStats()
+    problem._searchStats = stats
+    start = time.time()
+    try:
+        actions = searchFunction(problem, *args, **keyArgs)
+    finally:
+        stats.wallTime = time.time() - start
+    return actions, stats
+
+
 def tinyMazeSearch(problem):
     """
     Returns a sequence of moves that solves tinyMaze.  For any other
@@ -93,29 +177,35 @@ def depthFirstSearch(problem):
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
     """
     """Implimentation is backed buy a stack and a set. Set tracks visited nodes, and stack is a first-in-last-out structure.
-       Data is stored in the stack as a triple, so that it is immutable. Element 1 is a tuple with the game state and the moves 
-       to get to state, respectively. Element 2 is last move. Element 3 is cost (unused in DFS). Further searches are based mostly
-       on this implimentation, and store data in the backing data structure in the same way
+       Data is stored in the stack as a tuple of the game state and its node index in a util.SearchNodeStore, which
+       remembers the parent and last move of every node. The moves to a state are only rebuilt from the store once a goal
+       is popped, so pushing a successor costs the same no matter how deep it is. Further searches are based mostly on
+       this implimentation, and store data in the backing data structure in the same way
     """
+    stats = SearchStats.attach(problem)
     visited = set()
+    nodes = util.SearchNodeStore()
     stack =  util.Stack()
-    stack.push(((problem.getStartState(), list()),None,None))
+    stack.push((problem.getStartState(), nodes.ROOT))
     while (not stack.isEmpty()):
         
-        striple = stack.pop()
-        s = striple[0]
+        stats.frontier(len(stack.list))
+        state, node = stack.pop()
         
-        if problem.isGoalState(s[0]):
-            return s[1]
-        if s[0] not in visited:
-            visited.add(s[0])
-            successorList = problem.getSuccessors(s[0])
+        if problem.isGoalState(state):
+            stats.visited(len(visited))
+            return nodes.path(node)
+        if state not in visited:
+            visited.add(state)
+            successorList = problem.getSuccessors(state)
+            stats.expanded += 1
+            stats.generated += len(successorList)
             
             for triple in successorList:
-                temp = triple[0]
-                newtuple = (temp, s[1] + [triple[1]])
-                newtriple = (newtuple,triple[1],triple[2])
-                stack.push(newtriple)
+                if triple[0] in visited:
+                    stats.duplicates += 1
+                stack.push((triple[0], nodes.add(node, triple[1])))
+    stats.visited(len(visited))
     return None
 
 
@@ -126,54 +216,70 @@ def breadthFirstSearch(problem):
     """ This implimentation is backed by a set and a queue, a first in first out stucture. There are no differences to how the data is pushed into 
         backing structure. 
     """
+    stats = SearchStats.attach(problem)
     visited = set()
+    nodes = util.SearchNodeStore()
     queue =  util.Queue()
-    queue.push(((problem.getStartState(), list()),None,None))
+    queue.push((problem.getStartState(), nodes.ROOT))
     while (not queue.isEmpty()): 
         
-        striple = queue.pop()
-        s = striple[0]
-        if problem.isGoalState(s[0]):
-            return s[1]
-        if s[0] not in visited:
-            visited.add(s[0])
-            successorList = problem.getSuccessors(s[0])
+        stats.frontier(len(queue.list))
+        state, node = queue.pop()
+        if problem.isGoalState(state):
+            stats.visited(len(visited))
+            return nodes.path(node)
+        if state not in visited:
+            visited.add(state)
+            successorList = problem.getSuccessors(state)
+            stats.expanded += 1
+            stats.generated += len(successorList)
             
             for triple in successorList:
-                temp = triple[0]
-                newtuple = (temp, s[1] + [triple[1]])
-                newtriple = (newtuple,triple[1],triple[2])
-                queue.push(newtriple)
+                if triple[0] in visited:
+                    stats.duplicates += 1
+                queue.push((triple[0], nodes.add(node, triple[1])))
+    stats.visited(len(visited))
     return None
 
 
-def uniformCostSearch(problem):
+def uniformCostSearch(problem, decreaseKey=False):
     """
     Search the node of least total cost first.
     """
-    """This implimentation is backed buy a set and a Prioirty Queue, and is pushed into the stack with the cumulitive cost. The cost is tracked using the third element
-    of the main tuple that is pushed every exploration step. There are no other changes to data i8s pushed into the backing structure. 
+    """This implimentation is backed buy a set and a util.PriorityFrontier, which keeps the cheapest known cost of every state so
+    rediscovering a state only touches the frontier when the new path is cheaper. The cost is tracked using the third element
+    of the tuple that is pushed every exploration step. There are no other changes to data is pushed into the backing structure.
+    With decreaseKey set, the frontier updates entries in place instead of leaving stale ones behind. Frontier counters are
+    stored on the problem as _frontierStats.
     """
+    stats = SearchStats.attach(problem)
     visited = set()
-    queue =  util.PriorityQueue()
-    queue.push(((problem.getStartState(), list()),None,0),0)
-    while (not queue.isEmpty()):
-        
-        striple = queue.pop()
-        s = striple[0]
-        
-        if problem.isGoalState(s[0]):
-            return s[1]
-        if s[0] not in visited:
-            visited.add(s[0])
-            successorList = problem.getSuccessors(s[0])
+    nodes = util.SearchNodeStore()
+    queue =  util.PriorityFrontier(decreaseKey)
+    queue.push(problem.getStartState(), (nodes.ROOT, 0), 0)
+    try:
+        while (not queue.isEmpty()):
+            
+            state, (node, cost) = queue.pop()
+            
+            if problem.isGoalState(state):
+                return nodes.path(node)
+            visited.add(state)
+            successorList = problem.getSuccessors(state)
+            stats.expanded += 1
+            stats.generated += len(successorList)
             
             for triple in successorList:
-                temp = triple[0]
-                newtuple = (temp, s[1] + [triple[1]])
-                newtriple = (newtuple,triple[1],striple[2] + triple[2])
-                queue.push(newtriple, newtriple[2])
-    return None
+                nextCost = cost + triple[2]
+                if triple[0] in visited or triple[0] in queue.costs:
+                    stats.duplicates += 1
+                if triple[0] not in visited and queue.improves(triple[0], nextCost):
+                    queue.push(triple[0], (nodes.add(node, triple[1]), nextCost), nextCost)
+        return None
+    finally:
+        problem._frontierStats = queue.getStats()
+        stats.frontier(queue.peakSize)
+        stats.visited(len(visited))
 
 
 
@@ -185,35 +291,568 @@ def nullHeuristic(state, problem=None):
     return 0
 
 
-def aStarSearch(problem, heuristic=nullHeuristic):
+class MemoizedHeuristic:
+    """
+    Wraps a heuristic with a bounded least-recently-used cache keyed by
+    state, for heuristics that are expensive to evaluate (cornersHeuristic's
+    greedy corner tour, for example).  The cache assumes every call is for
+    the same problem, so use a new wrapper for each search.
+
+    Hit and miss counts are available from getStats().
+    """
+
+    def __init__(self, heuristic, maxSize=100000):
+        self.heuristic = heuristic
+        self.maxSize = maxSize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, state, problem=None):
+        cache = self.cache
+        if state in cache:
+            self.hits += 1
+            cache.move_to_end(state)
+            return cache[state]
+        self.misses += 1
+        value = self.heuristic(state, problem)
+        cache[state] = value
+        if len(cache) > self.maxSize:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def getStats(self):
+        calls = self.hits + self.misses
+        if calls:
+            hitRate = float(self.hits) / calls
+        else:
+            hitRate = 0.0
+        return {'calls': calls, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hitRate': hitRate}
+
+
+def aStarSearch(problem, heuristic=nullHeuristic, decreaseKey=False, cacheSize=0):
     """
     Search the node that has the lowest combined cost and heuristic first.
     """
+    """The heuristic is only evaluated for successors that are not closed yet and are cheaper than any path to them pushed
+    before. With cacheSize set, it is also wrapped in a MemoizedHeuristic of that size, and the cache counters are stored on
+    the problem as _heuristicStats.
+    """
     "*** YOUR CODE HERE ***"
+    stats = SearchStats.attach(problem)
+    if cacheSize:
+        heuristic = MemoizedHeuristic(heuristic, cacheSize)
+    cachingHeuristic = heuristic
+    heuristic = stats.countCalls(heuristic)
     visited = set()
-    queue =  util.PriorityQueue()
-    queue.push(((problem.getStartState(), list()),None,0),heuristic(problem.getStartState(),problem))
-    while (not queue.isEmpty()):
-        
-        striple = queue.pop()
-        s = striple[0]
-        
-        if problem.isGoalState(s[0]):
-            return s[1]
-        if s[0] not in visited:
-            visited.add(s[0])
-            successorList = problem.getSuccessors(s[0])
+    nodes = util.SearchNodeStore()
+    queue =  util.PriorityFrontier(decreaseKey)
+    queue.push(problem.getStartState(), (nodes.ROOT, 0), heuristic(problem.getStartState(),problem), 0)
+    try:
+        while (not queue.isEmpty()):
             
+            state, (node, cost) = queue.pop()
+            
+            if problem.isGoalState(state):
+                return nodes.path(node)
+            visited.add(state)
+            successorList = problem.getSuccessors(state)
+            stats.expanded += 1
+            stats.generated += len(successorList)
+            
+            for triple in successorList:
+                nextCost = cost + triple[2] # last cumulitive cost
+                if triple[0] in visited or triple[0] in queue.costs:
+                    stats.duplicates += 1
+                if triple[0] not in visited and queue.improves(triple[0], nextCost):
+                    queue.push(triple[0], (nodes.add(node, triple[1]), nextCost), nextCost + heuristic(triple[0], problem), nextCost)
+        return None
+    finally:
+        problem._frontierStats = queue.getStats()
+        stats.frontier(queue.peakSize)
+        stats.visited(len(visited))
+        if cacheSize:
+            problem._heuristicStats = cachingHeuristic.getStats()
+
+
+class ReverseSearchProblem(SearchProblem):
+    """
+    Runs a problem with a single explicit goal backwards, from its goal to its
+    start.  The wrapped problem must provide getGoalState() and
+    getPredecessors(state), where getPredecessors returns triples
+    (predecessor, action, stepCost) and 'action' is the forward action that
+    leads from the predecessor to 'state'.
+
+    The start of the wrapped problem is stored as 'goal', so position
+    heuristics such as manhattanHeuristic work unchanged in either direction.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+
+    def getStartState(self):
+        return self.problem.getGoalState()
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def getSuccessors(self, state):
+        return self.problem.getPredecessors(state)
+
+
+def bidirectionalSearch(problem):
+    """
+    Search breadth first from the start and backwards from the goal at the
+    same time, stopping once the two searches meet.
+    """
+    """Each side keeps a util.SearchNodeStore and a dict from every state it has reached to its node, and the side with the smaller
+    frontier expands one whole layer at a time. When a layer reaches states the other side has seen, the shortest of those joins
+    is kept, so the returned path is as short as the one BFS would find. The backward half is stored as forward actions from the
+    goal side, so it only has to be reversed.
+    """
+    stats = SearchStats.attach(problem)
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+    backward = ReverseSearchProblem(problem)
+    sides = []
+    for side in (problem, backward):
+        nodes = util.SearchNodeStore()
+        sides.append((side, nodes, {side.getStartState(): nodes.ROOT}, [side.getStartState()]))
+    while sides[0][3] and sides[1][3]:
+        if len(sides[0][3]) <= len(sides[1][3]):
+            index = 0
+        else:
+            index = 1
+        side, nodes, seen, frontier = sides[index]
+        otherNodes, otherSeen = sides[1 - index][1], sides[1 - index][2]
+        nextFrontier = []
+        best = None
+        stats.frontier(len(sides[0][3]) + len(sides[1][3]))
+        for state in frontier:
+            successorList = side.getSuccessors(state)
+            stats.expanded += 1
+            stats.generated += len(successorList)
             for triple in successorList:
-                temp = triple[0]
-                newtuple = (temp, s[1] + [triple[1]]) # state and action list
-                newtriple = (newtuple,triple[1],striple[2] + triple[2]) #state\action tuple, last direction, last cumulitive cost
-                queue.push(newtriple, newtriple[2] + heuristic(triple[0], problem))
+                if triple[0] in seen:
+                    stats.duplicates += 1
+                    continue
+                seen[triple[0]] = nodes.add(seen[state], triple[1])
+                nextFrontier.append(triple[0])
+                if triple[0] in otherSeen:
+                    otherPath = otherNodes.path(otherSeen[triple[0]])
+                    if best is None or len(otherPath) < len(best[1]):
+                        best = (nodes.path(seen[triple[0]]), otherPath)
+        stats.visited(len(sides[0][2]) + len(sides[1][2]))
+        if best is not None:
+            if index == 0:
+                forwardPath, backwardPath = best
+            else:
+                backwardPath, forwardPath = best
+            backwardPath.reverse()
+            return forwardPath + backwardPath
+        sides[index] = (side, nodes, seen, nextFrontier)
     return None
 
 
+def bidirectionalAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    Run A* forwards from the start and backwards from the goal at the same
+    time, estimating the distance to the far end of the search (front to end).
+    """
+    """Both sides are util.PriorityFrontiers, and the side whose cheapest entry is lower is expanded next. Every time one side
+    reaches a state the other side has a cost for, the join is remembered if it is the cheapest so far. The search stops once
+    either frontier cannot hold anything cheaper than that join, which keeps the result optimal for an admissible heuristic.
+    """
+    stats = SearchStats.attach(problem)
+    heuristic = stats.countCalls(heuristic)
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+    backward = ReverseSearchProblem(problem)
+    sides = []
+    for side in (problem, backward):
+        nodes = util.SearchNodeStore()
+        queue = util.PriorityFrontier()
+        queue.push(side.getStartState(), (nodes.ROOT, 0), heuristic(side.getStartState(), side), 0)
+        sides.append((side, nodes, queue, {side.getStartState(): nodes.ROOT}, set()))
+    bestCost, meet = None, None
+    while not sides[0][2].isEmpty() and not sides[1][2].isEmpty():
+        forwardTop, backwardTop = sides[0][2].topPriority(), sides[1][2].topPriority()
+        if meet is not None and max(forwardTop, backwardTop) >= bestCost:
+            break
+        if forwardTop <= backwardTop:
+            index = 0
+        else:
+            index = 1
+        side, nodes, queue, nodeOf, visited = sides[index]
+        otherQueue = sides[1 - index][2]
+        state, (node, cost) = queue.pop()
+        visited.add(state)
+        successorList = side.getSuccessors(state)
+        stats.expanded += 1
+        stats.generated += len(successorList)
+        stats.visited(len(sides[0][4]) + len(sides[1][4]))
+        for triple in successorList:
+            nextCost = cost + triple[2]
+            if triple[0] in visited or triple[0] in queue.costs:
+                stats.duplicates += 1
+            if triple[0] not in visited and queue.improves(triple[0], nextCost):
+                nodeOf[triple[0]] = nodes.add(node, triple[1])
+                queue.push(triple[0], (nodeOf[triple[0]], nextCost), nextCost + heuristic(triple[0], side), nextCost)
+            if triple[0] in otherQueue.costs:
+                total = queue.costs[triple[0]] + otherQueue.costs[triple[0]]
+                if meet is None or total < bestCost:
+                    bestCost, meet = total, triple[0]
+        stats.frontier(len(sides[0][2].heap) + len(sides[1][2].heap))
+    if meet is None:
+        return None
+    forwardPath = sides[0][1].path(sides[0][3][meet])
+    backwardPath = sides[1][1].path(sides[1][3][meet])
+    backwardPath.reverse()
+    return forwardPath + backwardPath
+
+
+def iterativeDeepeningAStarSearch(problem, heuristic=nullHeuristic, maxNodes=0):
+    """
+    Search depth first, cutting off any path whose cost plus heuristic is
+    above a bound, and raise the bound to the smallest value that was cut
+    off until a goal is reached (IDA*).
+
+    Only the current path is kept in memory, so the search never runs out
+    of space, at the price of re-expanding states in every iteration.  With
+    maxNodes set, the search gives up and returns None after that many
+    expansions, recording why in the stopReason of its SearchStats.
+    """
+    """The depth first search is iterative: the current path is kept as parallel lists of states, actions and path costs,
+    plus the successor list of every state on it that is still being worked through. A successor already on the path is
+    skipped, which is the only duplicate check.
+    """
+    stats = SearchStats.attach(problem)
+    heuristic = stats.countCalls(heuristic)
+    start = problem.getStartState()
+    bound = heuristic(start, problem)
+    expanded = 0
+    while True:
+        nextBound = None
+        states, actions, costs, successors = [start], [], [0], [None]
+        onPath = set([start])
+        while states:
+            state = states[-1]
+            if successors[-1] is None:
+                f = costs[-1] + heuristic(state, problem)
+                if f > bound:
+                    if nextBound is None or f < nextBound:
+                        nextBound = f
+                    successors[-1] = iter(())
+                elif problem.isGoalState(state):
+                    return actions
+                else:
+                    if maxNodes and expanded >= maxNodes:
+                        stats.stopReason = 'IDA* gave up after expanding %d nodes (bound %s)' % (expanded, bound)
+                        return None
+                    expanded += 1
+                    successorList = problem.getSuccessors(state)
+                    stats.expanded += 1
+                    stats.generated += len(successorList)
+                    stats.frontier(len(states))
+                    stats.visited(len(onPath))
+                    successors[-1] = iter(successorList)
+            for triple in successors[-1]:
+                if triple[0] in onPath:
+                    stats.duplicates += 1
+                else:
+                    states.append(triple[0])
+                    actions.append(triple[1])
+                    costs.append(costs[-1] + triple[2])
+                    successors.append(None)
+                    onPath.add(triple[0])
+                    break
+            else:
+                # Every successor of this state has been tried
+                onPath.discard(states.pop())
+                costs.pop()
+                successors.pop()
+                if actions:
+                    actions.pop()
+        if nextBound is None:
+            return None
+        bound = nextBound
+
+
+class _BoundedSearchNode:
+    "A search tree node kept in memory by memoryBoundedAStarSearch"
+    __slots__ = ('state', 'parent', 'action', 'g', 'f', 'depth', 'children', 'forgotten', 'version', 'inOpen')
+
+    def __init__(self, state, parent, action, g, f):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.g = g
+        self.f = f
+        self.depth = 0
+        if parent is not None:
+            self.depth = parent.depth + 1
+        self.children = set()           # actions of the children currently in memory
+        self.forgotten = float('inf')   # lowest f of any child dropped from memory
+        self.version = 0
+        self.inOpen = False
+
+    def path(self):
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
+
+    def isAncestor(self, state):
+        node = self
+        while node is not None:
+            if node.state == state:
+                return True
+            node = node.parent
+        return False
+
+
+def memoryBoundedAStarSearch(problem, heuristic=nullHeuristic, maxNodes=100000):
+    """
+    A* that never keeps more than maxNodes search nodes in memory, in the
+    style of SMA*.
+
+    Before a node is expanded, open leaves with the highest f (the
+    shallowest ones on ties) are dropped until its children fit, and each
+    dropped f is remembered by the leaf's parent.  The parent goes back on
+    the frontier with the lowest remembered f as soon as one of its children
+    is dropped, and expanding it again regenerates only the dropped
+    children, so the dropped part of the tree is searched again as soon as
+    it could hold a cheaper goal.  With an admissible heuristic any path it
+    returns is as short as the one A* finds, but a budget only a few nodes
+    above the depth of the solution can take a very long time, regenerating
+    the same subtrees over and over.  Returns None, with the reason in the
+    stopReason of its SearchStats, if the budget is too small to hold even
+    the path being explored.
+    """
+    """There is no closed set, since it would grow without bound; a successor is only skipped if it already appears among the
+    ancestors of the node being expanded. Children get f = max(g + h, f of the parent) so that f never decreases along a path.
+    The frontier is kept in two heaps with lazy deletion, one ordered best first to pick what to expand next and one ordered
+    worst first to pick what to drop.  Only leaves go on the second one: a parent on the frontier whose other children are
+    still in memory is added to it when its last child is dropped.
+    """
+    tickets = itertools.count()
+    best, worst = [], []
+    openNodes = [0]
+    infinity = float('inf')
+
+    def pushOpen(node):
+        node.version += 1
+        if not node.inOpen:
+            openNodes[0] += 1
+        node.inOpen = True
+        ticket = next(tickets)
+        heapq.heappush(best, (node.f, -node.depth, ticket, node.version, node))
+        if not node.children:
+            pushLeaf(node)
+
+    def pushLeaf(node):
+        heapq.heappush(worst, (-node.f, node.depth, -next(tickets), node.version, node))
+
+    def popValid(heap):
+        while heap:
+            entry = heapq.heappop(heap)
+            node = entry[4]
+            if node.inOpen and node.version == entry[3]:
+                return node
+        return None
+
+    def popLeaf():
+        # The worst open node with no children in memory, or None
+        while True:
+            node = popValid(worst)
+            if node is None or not node.children:
+                return node
+
+    def forget(node):
+        # Drop a leaf and fold its f into its parent, which goes back on the frontier to regenerate it.  A parent left with
+        # no children and only dead ends to regenerate is a dead end itself and is dropped too.  Returns the number dropped.
+        dropped = 0
+        while True:
+            if node.inOpen:
+                openNodes[0] -= 1
+            node.inOpen = False
+            dropped += 1
+            parent = node.parent
+            parent.children.discard(node.action)
+            parent.forgotten = min(parent.forgotten, node.f)
+            if parent.forgotten < infinity:
+                if not parent.inOpen or parent.f > parent.forgotten:
+                    parent.f = parent.forgotten
+                    pushOpen(parent)
+                elif not parent.children:
+                    pushLeaf(parent)
+                return dropped
+            if parent.children or parent.inOpen or parent.parent is None:
+                return dropped
+            parent.f = infinity
+            node = parent
+
+    stats = SearchStats.attach(problem)
+    heuristic = stats.countCalls(heuristic)
+    start = problem.getStartState()
+    root = _BoundedSearchNode(start, None, None, 0, heuristic(start, problem))
+    pushOpen(root)
+    inMemory = 1
+    while True:
+        node = popValid(best)
+        if node is None or node.f == infinity:
+            return None
+        node.inOpen = False
+        openNodes[0] -= 1
+        if problem.isGoalState(node.state):
+            return node.path()
+        successorList = problem.getSuccessors(node.state)
+        successors = [triple for triple in successorList if not node.isAncestor(triple[0])]
+        stats.expanded += 1
+        stats.generated += len(successorList)
+        stats.duplicates += len(successorList) - len(successors)
+        # Only the children that are not still in memory are (re)generated
+        successors = [triple for triple in successors if triple[1] not in node.children]
+        node.forgotten = infinity
+        # Make room before adding the children, so they are never the ones dropped
+        while inMemory + len(successors) > maxNodes:
+            victim = popLeaf()
+            if victim is None or victim.parent is None:
+                stats.stopReason = 'SMA*: %d nodes are not enough to hold the current path' % maxNodes
+                return None
+            inMemory -= forget(victim)
+        for triple in successors:
+            g = node.g + triple[2]
+            child = _BoundedSearchNode(triple[0], node, triple[1], g, max(g + heuristic(triple[0], problem), node.f))
+            node.children.add(triple[1])
+            inMemory += 1
+            pushOpen(child)
+        stats.frontier(openNodes[0])
+        stats.visited(inMemory)
+        if not node.children and not node.inOpen:
+            # A dead end: nothing below it can reach a goal
+            node.f = infinity
+            if node.parent is None:
+                return None
+            inMemory -= forget(node)
+
+
+def _jump(walls, x, y, dx, dy, goal):
+    """
+    Steps from (x,y) in direction (dx,dy) until it reaches a jump point, which
+    it returns, or a wall, in which case it returns None.
+    """
+    width, height = walls.width, walls.height
+    def blocked(x, y):
+        return x < 0 or y < 0 or x >= width or y >= height or walls[x][y]
+    while True:
+        x, y = x + dx, y + dy
+        if blocked(x, y):
+            return None
+        if (x, y) == goal:
+            return (x, y)
+        if dx:
+            # Forced neighbor: a side opens up that was walled off one step back
+            for side in (1, -1):
+                if not blocked(x, y + side) and blocked(x - dx, y + side):
+                    return (x, y)
+        elif _jump(walls, x, y, 1, 0, goal) is not None or _jump(walls, x, y, -1, 0, goal) is not None:
+            return (x, y)
+
+
+def jumpPointSearch(problem):
+    """
+    A* with jump points, for point to point pathfinding on a 4-connected grid
+    where every step costs 1 (a PositionSearchProblem with the default cost
+    function).  Returns the same length of path as A* with the manhattan
+    heuristic, but only expands the jump points: cells where the path may have
+    to turn because of a wall, instead of every cell of an open region.
+
+    The problem must have walls (a game.Grid) and getGoalState(); the
+    successor function is not used.
+    """
+    """Paths are put in a canonical order where vertical moves come first. A horizontal jump runs until a wall, the goal, or a
+    cell with a forced neighbor (a side cell that is open while the same side of the previous cell is a wall). A vertical jump
+    stops at any cell from which a horizontal jump would find something. A node reached horizontally only goes on straight or
+    to its forced neighbors; a node reached vertically goes on straight or turns either way. Every step of a jump is added to
+    the util.SearchNodeStore, so the path comes back as single moves.
+    """
+    from game import Directions
+    stats = SearchStats.attach(problem)
+    walls, goal = problem.walls, problem.getGoalState()
+    directions = {(0, 1): Directions.NORTH, (0, -1): Directions.SOUTH,
+                  (1, 0): Directions.EAST, (-1, 0): Directions.WEST}
+
+    def estimate(position):
+        stats.heuristicCalls += 1
+        return abs(position[0] - goal[0]) + abs(position[1] - goal[1])
+
+    def blocked(x, y):
+        return x < 0 or y < 0 or x >= walls.width or y >= walls.height or walls[x][y]
+
+    def prunedDirections(x, y, direction):
+        if direction is None:
+            return list(directions.keys())
+        dx, dy = direction
+        if dy:
+            return [direction, (1, 0), (-1, 0)]
+        result = [direction]
+        for side in (1, -1):
+            if not blocked(x, y + side) and blocked(x - dx, y + side):
+                result.append((0, side))
+        return result
+
+    start = problem.getStartState()
+    visited = set()
+    nodes = util.SearchNodeStore()
+    queue = util.PriorityFrontier()
+    queue.push(start, (nodes.ROOT, 0, None), estimate(start), 0)
+    try:
+        while not queue.isEmpty():
+            state, (node, cost, direction) = queue.pop()
+            if problem.isGoalState(state):
+                return nodes.path(node)
+            visited.add(state)
+            stats.expanded += 1
+            if hasattr(problem, '_expanded'):
+                problem._expanded += 1
+            x, y = state
+            for dx, dy in prunedDirections(x, y, direction):
+                jumpPoint = _jump(walls, x, y, dx, dy, goal)
+                if jumpPoint is None:
+                    continue
+                stats.generated += 1
+                steps = abs(jumpPoint[0] - x) + abs(jumpPoint[1] - y)
+                nextCost = cost + steps
+                if jumpPoint in visited or jumpPoint in queue.costs:
+                    stats.duplicates += 1
+                if jumpPoint not in visited and queue.improves(jumpPoint, nextCost):
+                    nextNode = node
+                    for i in range(steps):
+                        nextNode = nodes.add(nextNode, directions[(dx, dy)])
+                    queue.push(jumpPoint, (nextNode, nextCost, (dx, dy)), nextCost + estimate(jumpPoint), nextCost)
+        return None
+    finally:
+        stats.frontier(queue.peakSize)
+        stats.visited(len(visited))
+
+
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bibfs = bidirectionalSearch
+biastar = bidirectionalAStarSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = memoryBoundedAStarSearch
+jps = jumpPointSearch
@@ -40,10 +40,13 @@ from numpy import empty
 from game import Directions
 from game import Agent
 from game import Actions
+from game import BitGrid
 from project_1.project_1.search.game import Grid
 import util
 import time
+import heapq
 import search
+import distanceOracle
 
 
 class GoWestAgent(Agent):
@@ -75,21 +78,42 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
+      bidirectionalSearch or bibfs (PositionSearchProblem only)
+
+    Other arguments are passed to the search function as ints, for example
+      fn=astar,cacheSize=N                memoizes up to N heuristic values
+      fn=iterativeDeepeningAStarSearch    (idastar) IDA*, maxNodes=N stops after N expansions
+      fn=memoryBoundedAStarSearch         (smastar) SMA*-style A*, keeps at most maxNodes nodes
+
+    With statsFile=FILE, the search counters (see search.SearchStats) are
+    appended to FILE as one line of JSON per run, tagged with the layout,
+    search function, problem and heuristic.
 
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    # Subclasses that set up their own search without calling __init__ record no stats
+    statsFile = None
+    statsContext = {}
+
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', statsFile=None, **searchArgs):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        # Any other agent arguments are passed on to the search function as ints
+        code = func.__code__
+        argumentNames = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+        for name in searchArgs:
+            if name not in argumentNames:
+                raise AttributeError(name + ' is not an argument of ' + fn + '.')
+            searchArgs[name] = int(searchArgs[name])
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **searchArgs)
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -99,7 +123,7 @@ class SearchAgent(Agent):
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=heur, **searchArgs)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -107,6 +131,11 @@ class SearchAgent(Agent):
         self.searchType = globals()[prob]
         print('[SearchAgent] using problem type ' + prob)
 
+        self.statsFile = statsFile
+        self.statsContext = {'fn': fn, 'prob': prob}
+        if 'heuristic' in func.__code__.co_varnames:
+            self.statsContext['heuristic'] = heuristic
+
     def registerInitialState(self, state):
         """
         This is the first time that the agent sees the layout of the game board. Here, we
@@ -120,10 +149,27 @@ class SearchAgent(Agent):
 
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem
-        self.actions = self.searchFunction(problem)  # Find a path
+        self.actions, stats = search.runSearch(self.searchFunction, problem)  # Find a path
+        if self.statsFile is not None:
+            with open(self.statsFile, 'a') as f:
+                f.write(stats.toJson(layout=state.data.layout.name, found=self.actions is not None, **self.statsContext) + '\n')
+        if self.actions is None:
+            reason = ''
+            if stats.stopReason is not None:
+                reason = ' (%s)' % stats.stopReason
+            raise Exception('No path found after %.1f seconds%s' % (time.time() - starttime, reason))
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if '_frontierStats' in dir(problem):
+            print('Frontier pushes: %(pushes)d, rejected: %(rejected)d, stale pops: %(stalePops)d, peak size: %(peakSize)d'
+                  % problem._frontierStats)
+        if '_heuristicStats' in dir(problem):
+            print('Heuristic calls: %(calls)d, cache hits: %(hits)d (%(hitRate).1f%%), evictions: %(evictions)d'
+                  % dict(problem._heuristicStats, hitRate=100 * problem._heuristicStats['hitRate']))
+        print('Search stats: expanded %(expanded)d, generated %(generated)d, duplicates %(duplicates)d, '
+              'peak frontier %(peakFrontier)d, peak visited %(peakVisited)d, heuristic calls %(heuristicCalls)d'
+              % stats.asDict())
 
     def getAction(self, state):
         """
@@ -222,6 +268,33 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getGoalState(self):
+        return self.goal
+
+    def getPredecessors(self, state):
+        """
+        Returns the positions that lead to state in one move, as triples
+        (predecessor, action, stepCost) where action moves from the
+        predecessor into state.  Used to search backwards from the goal.
+        """
+
+        predecessors = []
+        cost = self.costFn(state)
+        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            x, y = state
+            dx, dy = Actions.directionToVector(action)
+            prevx, prevy = int(x - dx), int(y - dy)
+            if not self.walls[prevx][prevy]:
+                predecessors.append(((prevx, prevy), action, cost))
+
+        # Bookkeeping for display purposes
+        self._expanded += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions.  If those actions
@@ -382,6 +455,64 @@ class CornersProblem(search.SearchProblem):
                 return 999999
         return len(actions)
 
+    def decodeState(self, state):
+        "Returns state as a (position, visited corners) pair"
+        return state
+
+
+class EncodedCornersProblem(CornersProblem):
+    """
+    The CornersProblem with every search state packed into one int:
+
+      state = cellIndex << 4 | visitedMask
+
+    where cellIndex numbers the open cells column by column and bit i of
+    visitedMask is set once corners[i] has been visited.  Successors come from
+    a neighbor table built from the walls once, so expanding a state is a
+    table lookup and the visited set holds small ints instead of nested
+    tuples.  Use decodeState to get back a (position, visited corners) pair.
+
+    > python pacman.py -l mediumCorners -p SearchAgent -a fn=bfs,prob=EncodedCornersProblem
+    """
+
+    ALL_CORNERS = 15
+
+    def __init__(self, startingGameState):
+        CornersProblem.__init__(self, startingGameState)
+        self.cells = self.walls.asList(False)
+        self.cellIndex = dict([(cell, i) for i, cell in enumerate(self.cells)])
+        self.cornerBits = [0] * len(self.cells)
+        for i, corner in enumerate(self.corners):
+            if corner in self.cellIndex:
+                self.cornerBits[self.cellIndex[corner]] = 1 << i
+        self.neighbors = []
+        for x, y in self.cells:
+            moves = []
+            for action in [Directions.EAST, Directions.WEST, Directions.NORTH, Directions.SOUTH]:
+                dx, dy = Actions.directionToVector(action)
+                nextCell = (int(x + dx), int(y + dy))
+                if not self.walls[nextCell[0]][nextCell[1]]:
+                    moves.append((action, self.cellIndex[nextCell]))
+            self.neighbors.append(tuple(moves))
+
+    def getStartState(self):
+        return self.cellIndex[self.startingPosition] << 4
+
+    def isGoalState(self, state):
+        return state & 15 == EncodedCornersProblem.ALL_CORNERS
+
+    def getSuccessors(self, state):
+        mask = state & 15
+        cornerBits = self.cornerBits
+        successors = [(((nextCell << 4) | mask | cornerBits[nextCell]), action, 1)
+                      for action, nextCell in self.neighbors[state >> 4]]
+        self._expanded += 1
+        return successors
+
+    def decodeState(self, state):
+        visited = tuple([corner for i, corner in enumerate(self.corners) if state & (1 << i)])
+        return self.cells[state >> 4], visited
+
 
 def cornersHeuristic(state, problem: CornersProblem):
     """
@@ -408,9 +539,10 @@ def cornersHeuristic(state, problem: CornersProblem):
     walls = problem.walls  # These are the walls of the maze, as a Grid (game.py)
     
     "*** YOUR CODE HERE ***"
-    unvisted = [x for x in corners if x not in state[1]]
+    position, visited = problem.decodeState(state)
+    unvisted = [x for x in corners if x not in visited]
     cumulitiveLength = 0
-    fromHere = state[0]
+    fromHere = position
     while len(unvisted) > 0:
         length, index = closestCorner(fromHere, unvisted)
         cumulitiveLength += length
@@ -447,11 +579,15 @@ class FoodSearchProblem:
 
     A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodGrid:       a BitGrid (see game.py) of either True or False, specifying remaining food
+
+    BitGrids are immutable and only change when a dot is eaten, so successors
+    that don't eat share their parent's food, and hashing a state doesn't
+    walk the grid.
     """
 
     def __init__(self, startingGameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.start = (startingGameState.getPacmanPosition(), BitGrid.fromGrid(startingGameState.getFood()))
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self._expanded = 0
@@ -474,8 +610,7 @@ class FoodSearchProblem:
             dx, dy = Actions.directionToVector(direction)
             nextx, nexty = int(x + dx), int(y + dy)
             if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
+                nextFood = state[1].without(nextx, nexty)
                 successors.append((((nextx, nexty), nextFood), direction, 1))
         return successors
 
@@ -519,7 +654,7 @@ def foodHeuristic(state, problem):
     inadmissible or inconsistent heuristics may find optimal solutions, so be careful.
 
     The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a
-    Grid (see game.py) of either True or False. You can call foodGrid.asList()
+    BitGrid (see game.py) of either True or False. You can call foodGrid.asList()
     to get a list of food coordinates instead.
 
     If you want access to info like walls, capsules, etc., you can query the problem.
@@ -541,9 +676,89 @@ def foodHeuristic(state, problem):
     """
     position, foodGrid = state
     "*** YOUR CODE HERE ***"
-    coordList = foodGrid.toList()
-    
-    return 0
+    if 'engine' not in problem.heuristicInfo:
+        problem.heuristicInfo['engine'] = FoodHeuristicEngine(problem)
+    return problem.heuristicInfo['engine'].evaluate(position, foodGrid)
+
+
+class FoodHeuristicEngine:
+    """
+    Precomputed tables behind foodHeuristic.
+
+    When it is built, the engine runs one BFS over the walls from every dot
+    in the start state, which gives the true maze distance from each dot to
+    every cell Pacman can reach (and so between every pair of dots).  A state
+    is then bounded below by the larger of
+
+      - the maze distance to the farthest remaining dot, and
+      - the weight of a minimum spanning tree over the remaining dots plus
+        the distance to the nearest one,
+
+    both of which are consistent, so their max is too.  The spanning tree
+    only depends on which dots are left, so it is memoized by the food
+    BitGrid's bits.
+    """
+
+    def __init__(self, problem):
+        self.walls = problem.walls
+        food = problem.getStartState()[1]
+        if not isinstance(food, BitGrid):
+            food = BitGrid.fromGrid(food)
+        self.height = food.height
+        self.foodIds = {}  # BitGrid cell index -> dot id
+        self.distances = []  # dot id -> {cell: maze distance}
+        for index in food.cellIndices():
+            self.foodIds[index] = len(self.distances)
+            self.distances.append(self._bfs((index // self.height, index % self.height)))
+        self.positions = [(index // self.height, index % self.height) for index in food.cellIndices()]
+        self.spanningTrees = {}  # food bits -> (remaining dot ids, MST weight)
+        self.evaluations = 0
+
+    def _bfs(self, source):
+        distances = {source: 0}
+        fringe = util.Queue()
+        fringe.push(source)
+        while not fringe.isEmpty():
+            x, y = fringe.pop()
+            for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+                next = (x + dx, y + dy)
+                if next not in distances and not self.walls[next[0]][next[1]]:
+                    distances[next] = distances[(x, y)] + 1
+                    fringe.push(next)
+        return distances
+
+    def _spanningTree(self, food):
+        """
+        Returns the ids of the dots left in food and the weight of a minimum
+        spanning tree over them, computed with Prim's algorithm.
+        """
+        if food.bits in self.spanningTrees:
+            return self.spanningTrees[food.bits]
+        ids = [self.foodIds[index] for index in food.cellIndices()]
+        weight = 0
+        if ids:
+            positions, distances = self.positions, self.distances
+            best = dict([(i, distances[ids[0]].get(positions[i], 0)) for i in ids[1:]])
+            while best:
+                nearest = min(best, key=best.get)
+                weight += best.pop(nearest)
+                row = distances[nearest]
+                for i in best:
+                    d = row.get(positions[i], 0)
+                    if d < best[i]:
+                        best[i] = d
+        self.spanningTrees[food.bits] = (ids, weight)
+        return ids, weight
+
+    def evaluate(self, position, food):
+        self.evaluations += 1
+        if not isinstance(food, BitGrid):
+            food = BitGrid.fromGrid(food)
+        ids, weight = self._spanningTree(food)
+        if not ids:
+            return 0
+        toFood = [self.distances[i].get(position, 0) for i in ids]
+        return max(max(toFood), weight + min(toFood))
 
 def grahamScan(foodList):
     stack = util.Stack()
@@ -567,23 +782,123 @@ def findClosestFood(cords, foodList):
         
 
 
+class ClosestDotPlanner:
+    """
+    Plans a greedy tour that always goes to the closest remaining dot.
+
+    The planner keeps one distance field: for every open cell, the maze
+    distance to the nearest remaining dot, found with a BFS started from all
+    the dots at once.  The way to the closest dot from any cell is then just
+    downhill in the field.  When a dot is eaten only the cells whose distance
+    depended on it are recomputed, so the tour never searches from scratch
+    and never builds a GameState.
+
+    Ties between equally close dots are broken by the order north, south,
+    east, west of the first step, which can pick a different dot than a BFS
+    from Pacman would, but never a farther one.
+    """
+
+    def __init__(self, walls, food):
+        self.food = set(food.asList())
+        self.neighbors = {}  # open cell -> [(next cell, action)]
+        for x, y in walls.asList(False):
+            moves = []
+            for action in (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST):
+                dx, dy = Actions.directionToVector(action)
+                next = (int(x + dx), int(y + dy))
+                if not walls[next[0]][next[1]]:
+                    moves.append((next, action))
+            self.neighbors[(x, y)] = moves
+        self.distance = {}  # cells that cannot reach any dot are left out
+        self._flood(dict([(dot, 0) for dot in self.food]))
+
+    def _flood(self, seeds):
+        "Sets distances outward from seeds, a dict of cell -> distance, in order of distance"
+        heap = [(d, cell) for cell, d in seeds.items()]
+        heapq.heapify(heap)
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if cell in self.distance:
+                continue
+            self.distance[cell] = d
+            for next, action in self.neighbors[cell]:
+                if next not in self.distance:
+                    heapq.heappush(heap, (d + 1, next))
+
+    def pathToClosestDot(self, position):
+        """
+        Returns (actions, dot) for a shortest path from position to the
+        closest remaining dot, or (None, None) if no dot can be reached.
+        """
+        if position not in self.distance:
+            return None, None
+        actions = []
+        while self.distance[position] > 0:
+            downhill = self.distance[position] - 1
+            for next, action in self.neighbors[position]:
+                if self.distance.get(next) == downhill:
+                    break
+            actions.append(action)
+            position = next
+        return actions, position
+
+    def eat(self, dot):
+        """
+        Removes a dot and repairs the distance field.  The cells to repair are
+        found going outward from the dot a layer at a time: a cell is affected
+        if every neighbor one step closer to food was affected.  Their new
+        distances come from the unaffected cells around them.
+        """
+        self.food.discard(dot)
+        distance = self.distance
+        affected = set([dot])
+        fringe = util.Queue()
+        fringe.push(dot)
+        while not fringe.isEmpty():
+            cell = fringe.pop()
+            for next, action in self.neighbors[cell]:
+                if next in affected or distance.get(next) != distance[cell] + 1:
+                    continue
+                supported = False
+                for other, otherAction in self.neighbors[next]:
+                    if other not in affected and distance.get(other) == distance[next] - 1:
+                        supported = True
+                        break
+                if not supported:
+                    affected.add(next)
+                    fringe.push(next)
+        for cell in affected:
+            del distance[cell]
+        seeds = {}
+        for cell in affected:
+            around = [distance[other] for other, action in self.neighbors[cell] if other in distance]
+            if around:
+                seeds[cell] = min(around) + 1
+        self._flood(seeds)
+
+    def planTour(self, position):
+        "Returns the actions that eat every reachable dot, closest first, starting from position"
+        actions = []
+        while self.food:
+            path, dot = self.pathToClosestDot(position)
+            if path is None:
+                break
+            actions += path
+            self.eat(dot)
+            position = dot
+        return actions
+
+
 class ClosestDotSearchAgent(SearchAgent):
     """
     Search for all food using a sequence of searches
     """
 
     def registerInitialState(self, state):
-        self.actions = []
-        currentState = state
-        while currentState.getFood().count() > 0:
-            nextPathSegment = self.findPathToClosestDot(currentState)  # The missing piece
-            self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' % t)
-                currentState = currentState.generateSuccessor(0, action)
+        # The tour comes from one ClosestDotPlanner instead of a search per dot;
+        # findPathToClosestDot still finds a single leg with a search.
+        planner = ClosestDotPlanner(state.getWalls(), state.getFood())
+        self.actions = planner.planTour(state.getPacmanPosition())
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
 
@@ -665,9 +980,9 @@ class ApproximateSearchAgent(Agent):
 
 def mazeDistance(point1, point2, gameState):
     """
-    Returns the maze distance between any two points, using the search functions
-    you have already built.  The gameState can be any game state -- Pacman's position
-    in that state is ignored.
+    Returns the maze distance between any two points, using the all-pairs
+    distance table for the layout (see distanceOracle.py).  The gameState can
+    be any game state -- Pacman's position in that state is ignored.
 
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
@@ -676,7 +991,6 @@ def mazeDistance(point1, point2, gameState):
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
-    assert not walls[x1][y1], 'point1 is a wall: ' + point1
+    assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return distanceOracle.getOracle(walls).getDistance(point1, point2)
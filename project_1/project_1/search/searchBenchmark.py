@@ -0,0 +1,298 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for 
+# educational purposes provided that (1) you do not distribute or publish 
+# solutions, (2) you retain this notice, and (3) you provide clear 
+# attribution to UC Berkeley, including a link to 
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero 
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and 
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Runs every search function against every search layout in layouts/, without
+graphics, and prints a table of path costs, expansions, run times and peak
+memory.
+
+Layouts are matched to problems by name: *Maze layouts are run as
+PositionSearchProblems, *Corners as CornersProblems and *Search as
+FoodSearchProblems.  Each problem is solved with dfs, bfs, ucs and with astar
+under every heuristic that applies to it.
+
+Every run is timed --repeat times and the fastest time is reported.  Peak
+memory comes from one extra run under tracemalloc, which is kept out of the
+timings since tracing slows the search down a lot.  A run that expands more
+than --maxExpanded states is stopped and reported as over budget.
+
+The results can be written to a baseline file with --save and compared with
+a later run with --compare, which adds the change in time and expansions to
+the table and lists the runs that got slower than --tolerance allows.
+
+Examples:
+  python searchBenchmark.py
+  python searchBenchmark.py -l tinyMaze,mediumMaze -f bfs,astar -r 5
+  python searchBenchmark.py --save baseline.json
+  python searchBenchmark.py --compare baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+import layout
+import pacman
+import search
+import searchAgents
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+
+# Layout name suffix -> (problem class, heuristics to run astar with)
+PROBLEMS = [
+    ('Maze', searchAgents.PositionSearchProblem,
+     ['nullHeuristic', 'manhattanHeuristic', 'euclideanHeuristic']),
+    ('Corners', searchAgents.CornersProblem, ['nullHeuristic', 'cornersHeuristic']),
+    ('Search', searchAgents.FoodSearchProblem, ['nullHeuristic', 'foodHeuristic']),
+]
+
+FUNCTIONS = ['dfs', 'bfs', 'ucs', 'astar']
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def limitExpansions(problem, maxExpanded):
+    "Makes getSuccessors raise BudgetExceeded once maxExpanded states have been expanded"
+    getSuccessors = problem.getSuccessors
+    count = [0]
+    def limited(state):
+        count[0] += 1
+        if count[0] > maxExpanded:
+            raise BudgetExceeded()
+        return getSuccessors(state)
+    problem.getSuccessors = limited
+
+
+def getHeuristic(name):
+    if hasattr(searchAgents, name):
+        return getattr(searchAgents, name)
+    return getattr(search, name)
+
+
+def findCases(layoutNames=None, functions=FUNCTIONS):
+    """
+    Returns a list of (layout name, Layout, problem class, function name,
+    heuristic name) for every run of the benchmark.  The heuristic name is
+    None for the uninformed searches.
+    """
+    cases = []
+    for fileName in sorted(os.listdir(LAYOUT_DIR)):
+        if not fileName.endswith('.lay'):
+            continue
+        name = fileName[:-len('.lay')]
+        if layoutNames is not None and name not in layoutNames:
+            continue
+        for suffix, problemClass, heuristics in PROBLEMS:
+            if not name.endswith(suffix):
+                continue
+            board = layout.tryToLoad(os.path.join(LAYOUT_DIR, fileName))
+            for fn in functions:
+                if fn == 'astar':
+                    for heuristic in heuristics:
+                        cases.append((name, board, problemClass, fn, heuristic))
+                else:
+                    cases.append((name, board, problemClass, fn, None))
+    return cases
+
+
+def runCase(board, problemClass, fn, heuristic, maxExpanded, traceMemory=False):
+    """
+    Solves one benchmark problem from scratch and returns a dict with the
+    path cost, the search.SearchStats counters and, if traceMemory is set,
+    the peak memory allocated during the search in bytes.
+    """
+    state = pacman.GameState()
+    state.initialize(board, 0)
+    problem = problemClass(state)
+    if maxExpanded:
+        limitExpansions(problem, maxExpanded)
+    args = {}
+    if heuristic is not None:
+        args['heuristic'] = getHeuristic(heuristic)
+    result = {'cost': None, 'overBudget': False}
+    if traceMemory:
+        tracemalloc.start()
+    try:
+        actions, stats = search.runSearch(getattr(search, fn), problem, **args)
+        if actions is not None:
+            result['cost'] = problem.getCostOfActions(actions)
+    except BudgetExceeded:
+        stats = problem._searchStats
+        result['overBudget'] = True
+    finally:
+        if traceMemory:
+            result['peakMemory'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    result.update(stats.asDict())
+    return result
+
+
+def runBenchmark(cases, repeat=3, maxExpanded=200000, traceMemory=True, verbose=True):
+    """
+    Runs every case repeat times and returns a dict from case key
+    (layout/problem/function/heuristic) to its results, with the fastest
+    wall time of the repeats.
+    """
+    results = {}
+    for name, board, problemClass, fn, heuristic in cases:
+        key = caseKey(name, problemClass, fn, heuristic)
+        if verbose:
+            sys.stderr.write('%s ...\n' % key)
+        times = []
+        for i in range(max(1, repeat)):
+            result = runCase(board, problemClass, fn, heuristic, maxExpanded)
+            times.append(result['wallTime'])
+            if result['overBudget']:
+                # Running it again would only hit the budget again
+                break
+        result['wallTime'] = min(times)
+        result['repeats'] = len(times)
+        if traceMemory:
+            result['peakMemory'] = runCase(board, problemClass, fn, heuristic, maxExpanded, True)['peakMemory']
+        result.update({'layout': name, 'prob': problemClass.__name__, 'fn': fn, 'heuristic': heuristic})
+        results[key] = result
+    return results
+
+
+def caseKey(name, problemClass, fn, heuristic):
+    return '/'.join([name, problemClass.__name__, fn, heuristic or '-'])
+
+
+def formatTable(results, baseline=None):
+    "Returns the results as a text table, with the changes from baseline if one is given"
+    header = ['layout', 'problem', 'search', 'heuristic', 'cost', 'expanded', 'time ms', 'peak KB']
+    if baseline is not None:
+        header += ['time diff', 'expanded diff']
+    rows = [header]
+    for key in sorted(results):
+        result = results[key]
+        cost = result['cost']
+        if result['overBudget']:
+            cost = 'budget'
+        elif cost is None:
+            cost = 'none'
+        peak = '-'
+        if 'peakMemory' in result:
+            peak = '%.0f' % (result['peakMemory'] / 1024.0)
+        row = [result['layout'], result['prob'], result['fn'], result['heuristic'] or '-', str(cost),
+               str(result['expanded']), '%.1f' % (1000 * result['wallTime']), peak]
+        if baseline is not None:
+            if key in baseline:
+                old = baseline[key]
+                row.append(percentChange(old['wallTime'], result['wallTime']))
+                row.append('%+d' % (result['expanded'] - old['expanded']))
+            else:
+                row += ['new', 'new']
+        rows.append(row)
+    widths = [max([len(row[i]) for row in rows]) for i in range(len(header))]
+    lines = []
+    for row in rows:
+        cells = [cell.ljust(width) if i < 4 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))]
+        lines.append('  '.join(cells).rstrip())
+    lines.insert(1, '-' * len(lines[0]))
+    return '\n'.join(lines)
+
+
+def percentChange(old, new):
+    if old == 0:
+        return '-'
+    return '%+.0f%%' % (100.0 * (new - old) / old)
+
+
+def findRegressions(results, baseline, tolerance, minSlowdown=0.005):
+    """
+    Returns the keys of runs that expanded more states than in the baseline,
+    changed path cost, or got slower by more than the tolerance (a fraction).
+    Slowdowns under minSlowdown seconds are timer noise and are ignored.
+    """
+    regressions = []
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        old, new = baseline[key], results[key]
+        if new['expanded'] > old['expanded'] or new['cost'] != old['cost']:
+            regressions.append(key)
+        elif new['wallTime'] > max(old['wallTime'] * (1 + tolerance), old['wallTime'] + minSlowdown):
+            regressions.append(key)
+    return regressions
+
+
+def saveBaseline(results, fileName):
+    record = {'python': sys.version.split()[0], 'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}
+    with open(fileName, 'w') as f:
+        json.dump(record, f, indent=1, sort_keys=True)
+
+
+def loadBaseline(fileName):
+    with open(fileName) as f:
+        return json.load(f)['results']
+
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__.strip().split('\n\n')[0])
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='comma separated layout names to run (default: every search layout)')
+    parser.add_option('-f', '--functions', dest='functions', default=','.join(FUNCTIONS),
+                      help='comma separated search functions to run (default: %default)')
+    parser.add_option('-r', '--repeat', dest='repeat', type='int', default=3,
+                      help='times to run each search, the fastest is reported (default: %default)')
+    parser.add_option('-m', '--maxExpanded', dest='maxExpanded', type='int', default=200000,
+                      help='stop a search after this many expansions, 0 for no limit (default: %default)')
+    parser.add_option('--noMemory', dest='traceMemory', action='store_false', default=True,
+                      help='skip the tracemalloc run')
+    parser.add_option('--save', dest='save', default=None,
+                      help='write the results to this baseline file')
+    parser.add_option('--compare', dest='compare', default=None,
+                      help='compare the results with this baseline file')
+    parser.add_option('--tolerance', dest='tolerance', type='float', default=0.25,
+                      help='slowdown allowed before a run counts as a regression (default: %default)')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    layoutNames = None
+    if options.layouts is not None:
+        layoutNames = options.layouts.split(',')
+    functions = options.functions.split(',')
+    for fn in functions:
+        if fn not in dir(search):
+            raise AttributeError(fn + ' is not a search function in search.py.')
+    baseline = None
+    if options.compare is not None:
+        baseline = loadBaseline(options.compare)
+
+    results = runBenchmark(findCases(layoutNames, functions), options.repeat, options.maxExpanded,
+                           options.traceMemory)
+    print(formatTable(results, baseline))
+    if options.save is not None:
+        saveBaseline(results, options.save)
+        print('Baseline written to %s' % options.save)
+    if baseline is not None:
+        regressions = findRegressions(results, baseline, options.tolerance)
+        if regressions:
+            print('\nRegressions against %s:' % options.compare)
+            for key in regressions:
+                print('  ' + key)
+            sys.exit(1)
+        print('\nNo regressions against %s' % options.compare)
@@ -450,9 +450,123 @@ class CornerProblemTest(testClasses.TestCase):
         handle.write('solution_length: "%s"\n' % length)
         handle.close()
 
+
+
+class MemoryBoundedSearchTest(testClasses.TestCase):
+    """
+    Checks that memoryBoundedAStarSearch finds a path as short as A* on a
+    CornersProblem for every budget in maxNodes (each one more than the
+    depth of the solution), even though it has to drop and regenerate parts
+    of the search tree to stay inside the smaller ones.
+    """
+
+    def __init__(self, question, testDict):
+        super(MemoryBoundedSearchTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.budgets = [int(b) for b in testDict['maxNodes'].split()]
+
+    def problem(self, searchAgents):
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        return searchAgents.CornersProblem(gameState)
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gold_length = int(solutionDict['solution_length'])
+        for budget in self.budgets:
+            problem = self.problem(searchAgents)
+            solution = search.memoryBoundedAStarSearch(problem, maxNodes=budget)
+            if type(solution) != type([]) or not checkSolution(problem, solution):
+                grades.addMessage('FAIL: %s' % self.path)
+                grades.addMessage('No path to the goal found with maxNodes=%d (got %s)' % (budget, solution))
+                return False
+            if len(solution) != gold_length:
+                grades.addMessage('FAIL: %s' % self.path)
+                grades.addMessage('Optimal solution not found with maxNodes=%d.' % budget)
+                grades.addMessage('\tsolution length:\t\t%s' % len(solution))
+                grades.addMessage('\tcorrect solution length:\t%s' % gold_length)
+                return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tsolution length:\t\t%s' % gold_length)
+        grades.addMessage('\tmaxNodes:\t\t%s' % ' '.join([str(b) for b in self.budgets]))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The length of the path A* finds.\n')
+        handle.write('solution_length: "%s"\n' % len(search.astar(self.problem(searchAgents))))
+        handle.close()
+        return True
         
 
 
+class PatternDatabaseTest(testClasses.TestCase):
+    """
+    Checks that A* with eightpuzzle.patternDatabaseHeuristic finds shortest
+    solutions: the length of every path must equal the puzzle's distance from
+    the goal, found by one breadth first search back from the goal over the
+    whole eight puzzle.  An admissible heuristic that is not consistent can
+    fail this, since aStarSearch never reopens a closed state.
+    """
+
+    def __init__(self, question, testDict):
+        super(PatternDatabaseTest, self).__init__(question, testDict)
+        self.puzzles = [[int(n) for n in line.split()] for line in testDict['puzzles'].split('\n') if line.strip()]
+        self.randomPuzzles = int(testDict['randomPuzzles'])
+        self.seed = int(testDict['seed'])
+
+    def goalDistances(self, eightpuzzle):
+        goal = eightpuzzle.EightPuzzleState(list(range(9)))
+        distances = {goal: 0}
+        fringe = [goal]
+        while fringe:
+            nextFringe = []
+            for puzzle in fringe:
+                for move in puzzle.legalMoves():
+                    next = puzzle.result(move)
+                    if next not in distances:
+                        distances[next] = distances[puzzle] + 1
+                        nextFringe.append(next)
+            fringe = nextFringe
+        return distances
+
+    def execute(self, grades, moduleDict, solutionDict):
+        import random
+        import eightpuzzle
+        search = moduleDict['search']
+        distances = self.goalDistances(eightpuzzle)
+        puzzles = [eightpuzzle.EightPuzzleState(numbers) for numbers in self.puzzles]
+        puzzles += random.Random(self.seed).sample(sorted(distances, key=lambda p: p.getTiles()), self.randomPuzzles)
+        for puzzle in puzzles:
+            problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+            path = search.aStarSearch(problem, eightpuzzle.patternDatabaseHeuristic)
+            if path is None or len(path) != distances[puzzle]:
+                grades.addMessage('FAIL: %s' % self.path)
+                grades.addMessage('Optimal solution not found for the puzzle %s.' % ' '.join(map(str, puzzle.getTiles())))
+                grades.addMessage('\tsolution length:\t\t%s' % (path if path is None else len(path)))
+                grades.addMessage('\tcorrect solution length:\t%s' % distances[puzzle])
+                return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpuzzles solved optimally:\t%d' % len(puzzles))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# File intentionally blank.\n')
+        handle.close()
+        return True
+
+
 # template = """class: "HeuristicTest"
 # 
 # heuristic: "foodHeuristic"
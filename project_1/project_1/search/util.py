@@ -16,6 +16,7 @@
 import sys
 import inspect
 import heapq, random
+from array import array
 
 
 class FixedRandom:
@@ -201,6 +202,185 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class PriorityFrontier:
+    """
+      A priority queue for graph search frontiers that remembers the best
+      known path cost of every state it has seen.  Unlike PriorityQueue, a
+      state is only held once: pushing it again with a higher (or equal) cost
+      is rejected, and pushing it with a lower cost replaces the old entry.
+
+      By default replaced entries are left in the heap, marked as removed, and
+      skipped when they reach the top (lazy deletion).  With decreaseKey=True
+      the heap is indexed by state and the existing entry is moved up in
+      place, so the heap never holds more than one entry per state.
+
+      Either way ties are broken by insertion order, and an improved entry
+      counts as newly inserted, so both modes pop states in the same order
+      PriorityQueue would pop their cheapest duplicate.
+
+      Counters for pushes, rejected pushes, decrease-keys, stale pops and the
+      peak heap size are available from getStats().
+    """
+    REMOVED = object()
+
+    def __init__(self, decreaseKey=False):
+        self.decreaseKey = decreaseKey
+        self.heap = []
+        self.count = 0
+        self.costs = {}     # best known cost of every state ever pushed
+        self.entries = {}   # live heap entry of every state on the frontier
+        self.positions = {} # heap index of every live entry (decreaseKey only)
+        self.pushes = 0
+        self.rejected = 0
+        self.decreases = 0
+        self.stalePops = 0
+        self.peakSize = 0
+
+    def improves(self, key, cost):
+        "Returns true if 'cost' is lower than any cost 'key' has been pushed with"
+        best = self.costs.get(key)
+        return best is None or cost < best
+
+    def push(self, key, item, priority, cost=None):
+        """
+          Pushes 'item' for state 'key'.  'cost' is the path cost used to
+          compare duplicates and defaults to 'priority'.  Returns false if
+          the push was rejected because 'key' is already known to be as cheap.
+        """
+        if cost is None:
+            cost = priority
+        if not self.improves(key, cost):
+            self.rejected += 1
+            return False
+        self.costs[key] = cost
+        entry = [priority, self.count, key, item]
+        self.count += 1
+        self.pushes += 1
+        old = self.entries.get(key)
+        self.entries[key] = entry
+        if old is not None:
+            self.decreases += 1
+            if self.decreaseKey:
+                index = self.positions[key]
+                self.heap[index] = entry
+                self._siftUp(index)
+                return True
+            old[2] = PriorityFrontier.REMOVED
+        if self.decreaseKey:
+            self.heap.append(entry)
+            self.positions[key] = len(self.heap) - 1
+            self._siftUp(len(self.heap) - 1)
+        else:
+            heapq.heappush(self.heap, entry)
+        if len(self.heap) > self.peakSize:
+            self.peakSize = len(self.heap)
+        return True
+
+    def pop(self):
+        "Returns the (key, item) pair with the lowest priority"
+        if self.decreaseKey:
+            entry = self.heap[0]
+            last = self.heap.pop()
+            if self.heap:
+                self.heap[0] = last
+                self.positions[last[2]] = 0
+                self._siftDown(0)
+            del self.positions[entry[2]]
+        else:
+            entry = heapq.heappop(self.heap)
+            while entry[2] is PriorityFrontier.REMOVED:
+                self.stalePops += 1
+                entry = heapq.heappop(self.heap)
+        del self.entries[entry[2]]
+        return entry[2], entry[3]
+
+    def isEmpty(self):
+        return len(self.entries) == 0
+
+    def topPriority(self):
+        "Returns the lowest priority on the frontier without popping it"
+        heap = self.heap
+        while heap[0][2] is PriorityFrontier.REMOVED:
+            heapq.heappop(heap)
+            self.stalePops += 1
+        return heap[0][0]
+
+    def getStats(self):
+        return {'pushes': self.pushes, 'rejected': self.rejected,
+                'decreases': self.decreases, 'stalePops': self.stalePops,
+                'peakSize': self.peakSize}
+
+    def _siftUp(self, index):
+        heap, positions = self.heap, self.positions
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent][:2] <= entry[:2]:
+                break
+            heap[index] = heap[parent]
+            positions[heap[index][2]] = index
+            index = parent
+        heap[index] = entry
+        positions[entry[2]] = index
+
+    def _siftDown(self, index):
+        heap, positions = self.heap, self.positions
+        entry = heap[index]
+        size = len(heap)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][:2] < heap[child][:2]:
+                child += 1
+            if entry[:2] <= heap[child][:2]:
+                break
+            heap[index] = heap[child]
+            positions[heap[index][2]] = index
+            index = child
+        heap[index] = entry
+        positions[entry[2]] = index
+
+class SearchNodeStore:
+    """
+      Stores search nodes as (parent index, action) pairs in flat arrays, so a
+      frontier only has to hold a node index instead of a full action list.
+      Node 0 is always the root and has no parent and no action.
+
+      The path to a node is only rebuilt when it is asked for, usually once a
+      goal has been popped:
+
+      >>> nodes = SearchNodeStore()
+      >>> a = nodes.add(SearchNodeStore.ROOT, 'North')
+      >>> b = nodes.add(a, 'East')
+      >>> nodes.path(b)
+      ['North', 'East']
+    """
+    ROOT = 0
+
+    def __init__(self):
+        self.parents = array('l', [-1])
+        self.actions = [None]
+
+    def add(self, parent, action):
+        "Records a child of node 'parent' reached by 'action' and returns its index"
+        self.parents.append(parent)
+        self.actions.append(action)
+        return len(self.actions) - 1
+
+    def path(self, node):
+        "Returns the list of actions leading from the root to 'node'"
+        path = []
+        parents, actions = self.parents, self.actions
+        while node != SearchNodeStore.ROOT:
+            path.append(actions[node])
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def __len__(self):
+        return len(self.actions)
+
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"